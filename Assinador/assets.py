@@ -0,0 +1,81 @@
+# assets.py — Registro de recursos do carimbo (brasões e fontes), carregado uma vez por processo
+# ------------------------------------------------------------------------------------
+# Brasões por órgão: static/brasao/<slug-do-orgao>.png, onde o slug vem de User.orgao
+# (ex.: "SEMED" -> semed.png, "Secretaria de Saúde" -> secretaria-de-saude.png).
+# Órgão sem arquivo próprio usa static/brasao/brasao.png.
+import os, io, re, threading, unicodedata
+from functools import lru_cache
+from PIL import Image, ImageFont
+
+BRASAO_DIR = "static/brasao"
+DEFAULT_BRASAO = "brasao"          # static/brasao/brasao.png
+BRASAO_SIZE_PX = (35, 50)          # tamanho colado no caminho de imagem (PIL)
+
+
+def orgao_slug(orgao: str) -> str:
+    txt = unicodedata.normalize("NFKD", orgao or "").encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^a-z0-9]+", "-", txt.lower()).strip("-")
+
+
+class AssetRegistry:
+    """Brasões (PNG já lido) indexados pelo slug do órgão; lidos do disco uma única vez."""
+
+    def __init__(self, brasao_dir: str = BRASAO_DIR):
+        self.brasao_dir = brasao_dir
+        self._emblems = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self._emblems is None:
+                emblems = {}
+                for nome in os.listdir(self.brasao_dir):
+                    slug, ext = os.path.splitext(nome)
+                    if ext.lower() == ".png":
+                        with open(os.path.join(self.brasao_dir, nome), "rb") as f:
+                            emblems[slug.lower()] = f.read()
+                self._emblems = emblems
+        return self._emblems
+
+    def emblem_key(self, orgao: str = None) -> str:
+        """Slug do brasão efetivo do órgão (serve de chave de cache/xref)."""
+        slug = orgao_slug(orgao)
+        return slug if slug in self.load() else DEFAULT_BRASAO
+
+    def emblem_png(self, orgao: str = None) -> bytes:
+        return self.load()[self.emblem_key(orgao)]
+
+
+registry = AssetRegistry()
+
+
+def emblem_png(orgao: str = None) -> bytes:
+    return registry.emblem_png(orgao)
+
+
+@lru_cache(maxsize=256)
+def _emblem_rgba(key: str, size):
+    return Image.open(io.BytesIO(registry.load()[key])).resize(size).convert("RGBA")
+
+
+def emblem_rgba(orgao: str = None, size=BRASAO_SIZE_PX):
+    """Brasão decodificado e redimensionado, pronto para paste (cache por órgão e tamanho)."""
+    return _emblem_rgba(registry.emblem_key(orgao), tuple(size))
+
+
+@lru_cache(maxsize=None)
+def pil_fonts():
+    try:
+        fonte = ImageFont.truetype("static/fonts/DejaVuSans.ttf", size=12)
+        fonte_b = ImageFont.truetype("static/fonts/DejaVuSans-Bold.ttf", size=18)
+    except Exception:
+        fonte = ImageFont.load_default()
+        fonte_b = ImageFont.load_default()
+    return fonte, fonte_b
+
+
+def warm():
+    """Decodifica todos os brasões e fontes (initializer do pool de assinatura)."""
+    for key in registry.load():
+        _emblem_rgba(key, BRASAO_SIZE_PX)
+    pil_fonts()
@@ -1,10 +1,12 @@
 # auth.py — Autenticação segura (Flask + SQLAlchemy)
-import re, time, secrets
+import re, secrets
 from datetime import datetime
 from functools import wraps
 from flask import Blueprint, request, session, redirect, url_for, flash, current_app, render_template
-from werkzeug.security import generate_password_hash, check_password_hash
 from models import db, User
+from passwords import password_hashing, HashBusy
+from ratelimit import attempt_limiter
+from metrics import metrics
 
 bp = Blueprint("auth", __name__)
 
@@ -22,19 +24,15 @@ def is_valid_cpf_digits(cpf: str) -> bool:
     return bool(_cpf_digits_re.match(cpf or ""))
 
 def _hash(texto: str) -> str:
-    return generate_password_hash(texto, method="pbkdf2:sha256", salt_length=16)
+    # esquema/custo atuais (PASSWORD_HASH_SCHEME, PBKDF2_ITERATIONS, ARGON2_*)
+    return password_hashing.hash(texto)
 
-def _check_hash(hashval: str, texto: str) -> bool:
-    try:
-        return check_password_hash(hashval or "", texto or "")
-    except Exception:
-        return False
-
-def _now() -> int:
-    return int(time.time())
+def _check_hash(hashval: str, texto: str):
+    """(ok, novo_hash | None) — verificação no pool de hash; novo_hash se o gravado estiver desatualizado."""
+    return password_hashing.verify_and_update(hashval, texto)
 
 def _cfg(key, default=None):
-    defaults = {"MAX_LOGIN_ATTEMPTS": 5, "LOCKOUT_SECONDS": 150}
+    defaults = {"MAX_LOGIN_ATTEMPTS": 5, "LOCKOUT_SECONDS": 150, "LOGIN_ATTEMPT_WINDOW": 900}
     return current_app.config.get(key, defaults.get(key, default))
 
 # ----------------------- CSRF -----------------------
@@ -59,31 +57,25 @@ def inject_ctx():
     }
 
 # ----------------------- Rate limit de login -----------------------
-_login_attempts = {}
+# Contagem em ratelimit.attempt_limiter (RATELIMIT_STORE): com store compartilhado,
+# MAX_LOGIN_ATTEMPTS vale para o conjunto de workers, não por processo.
+def client_ip() -> str:
+    # X-Forwarded-For só conta atrás de TRUSTED_PROXIES (o ProxyFix de create_app já o
+    # aplicou em remote_addr); lido direto, qualquer cliente trocaria de "IP" à vontade.
+    return request.remote_addr or "0.0.0.0"
 
 def _key_for_login(email: str) -> str:
-    ip = request.headers.get("X-Forwarded-For", request.remote_addr or "0.0.0.0").split(",")[0].strip()
-    return f"{(email or '').lower()}|{ip}"
+    return f"login:{(email or '').lower()}|{client_ip()}"
 
 def _is_locked(email: str) -> int:
-    entry = _login_attempts.get(_key_for_login(email))
-    if not entry:
-        return 0
-    if entry.get("lock_until", 0) > _now():
-        return max(0, entry["lock_until"] - _now())
-    return 0
+    return attempt_limiter.locked(_key_for_login(email))
 
 def _register_fail(email: str):
-    key = _key_for_login(email)
-    e = _login_attempts.get(key, {"count": 0, "lock_until": 0})
-    e["count"] += 1
-    if e["count"] >= _cfg("MAX_LOGIN_ATTEMPTS"):
-        e["lock_until"] = _now() + _cfg("LOCKOUT_SECONDS")
-        e["count"] = 0
-    _login_attempts[key] = e
+    attempt_limiter.hit(_key_for_login(email), _cfg("MAX_LOGIN_ATTEMPTS"),
+                        _cfg("LOCKOUT_SECONDS"), _cfg("LOGIN_ATTEMPT_WINDOW"))
 
 def _clear_attempts(email: str):
-    _login_attempts.pop(_key_for_login(email), None)
+    attempt_limiter.clear(_key_for_login(email))
 
 # ----------------------- Guards -----------------------
 def login_required(view):
@@ -126,21 +118,41 @@ def login():
     cpf_digits = normalize_cpf(request.form.get("cpf"))
 
     if not is_valid_email(email) or not is_valid_cpf_digits(cpf_digits):
+        metrics.count("login", "invalido")
         flash("E-mail ou CPF incorreto.", "danger")
         return redirect(url_for("auth.login"))
 
-    locked = _is_locked(email)
+    with metrics.timer("login", "ratelimit"):
+        locked = _is_locked(email)
     if locked > 0:
+        metrics.count("login", "bloqueado")
         mins = (locked + 59) // 60
         flash(f"Tentativas excedidas. Aguarde {mins} min para tentar novamente.", "danger")
         return redirect(url_for("auth.login"))
 
-    u = User.query.filter_by(email=email).first()
-    if not u or not _check_hash(u.cpf_hash, cpf_digits):
-        _register_fail(email)
+    with metrics.timer("login", "db"):
+        u = User.query.filter_by(email=email).first()
+    try:
+        # inclui a espera pelo pool de hash
+        with metrics.timer("login", "hash"):
+            ok, novo_hash = _check_hash(u.cpf_hash, cpf_digits) if u else (False, None)
+    except HashBusy as e:
+        metrics.count("login", "ocupado")
+        flash(str(e), "warning")
+        return redirect(url_for("auth.login"))
+    if not ok:
+        with metrics.timer("login", "ratelimit"):
+            _register_fail(email)
+        metrics.count("login", "falha")
         flash("Usuário ou senha inválidos.", "danger")
         return redirect(url_for("auth.login"))
 
+    if novo_hash:   # atualiza para o esquema/custo configurado
+        u.cpf_hash = novo_hash
+        with metrics.timer("login", "db"):
+            db.session.commit()
+    metrics.count("login", "ok")
+
     _clear_attempts(email)
     session.clear()          # previne fixation
     ensure_csrf()          # novo token para sessão autenticada
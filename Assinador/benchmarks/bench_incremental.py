@@ -0,0 +1,61 @@
+# bench_incremental.py — Regravação completa x atualização incremental do PDF assinado
+# ------------------------------------------------------------------------------------
+# Uso (a partir de Assinador/):
+#   python benchmarks/bench_incremental.py [--repeat 5] [arquivo.pdf ...]
+# Sem arquivos, usa todos os PDFs de static/arquivos/uploads.
+import os, sys, argparse, statistics, tempfile, time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.chdir(BASE_DIR)   # stamping/assets usam caminhos relativos a static/
+
+import stamping  # noqa: E402
+
+UPLOADS_DIR = os.path.join("static", "arquivos", "uploads")
+
+
+def _stamps(crc="bench00000"):
+    linhas = stamping.stamp_lines("Servidor de Teste", "123.456.789-01", "12345", "SEMED",
+                                  "Projeto Aprovado", "0001/2025", crc)
+    placement = {"page": 1, "x": 40, "y": 40, "w": 200, "h": 200, "canvas_w": 600, "canvas_h": 800}
+    return [{"placement": placement, "linhas": linhas, "status": "Projeto Aprovado", "orgao": "SEMED"}]
+
+
+def bench_file(path, repeat, tmpdir):
+    qr = stamping.qr_png("https://exemplo.gov.br/verificar?crc=bench00000")
+    out = {}
+    for mode in stamping.OUTPUT_MODES:
+        dst = os.path.join(tmpdir, f"{mode}.pdf")
+        tempos = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            stamping.stamp_pdf(path, dst, _stamps(), qr, output_mode=mode)
+            tempos.append(time.perf_counter() - t0)
+        out[mode] = (statistics.median(tempos) * 1000, os.path.getsize(dst))
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("arquivos", nargs="*")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args(argv)
+
+    arquivos = args.arquivos or sorted(
+        os.path.join(UPLOADS_DIR, n) for n in os.listdir(UPLOADS_DIR) if n.lower().endswith(".pdf"))
+    stamping.warm_worker()
+
+    print(f"{'arquivo':<48} {'original':>11} {'full ms':>9} {'full bytes':>11} {'incr ms':>9} {'incr bytes':>11}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for path in arquivos:
+            try:
+                r = bench_file(path, args.repeat, tmpdir)
+            except Exception as e:
+                print(f"{os.path.basename(path)[:48]:<48} erro: {e}")
+                continue
+            print(f"{os.path.basename(path)[:48]:<48} {os.path.getsize(path):>11} "
+                  f"{r['full'][0]:>9.1f} {r['full'][1]:>11} {r['incremental'][0]:>9.1f} {r['incremental'][1]:>11}")
+
+
+if __name__ == "__main__":
+    main()
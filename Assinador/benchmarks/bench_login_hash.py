@@ -0,0 +1,65 @@
+# bench_login_hash.py — Vazão de verificação do hash de login por esquema/custo
+# ------------------------------------------------------------------------------------
+# Uso (a partir de Assinador/):
+#   python benchmarks/bench_login_hash.py [--seconds 3] [--threads 1,2,4]
+# Para cada configuração mede logins/s (verificações de CPF corretas) com 1..N threads
+# no mesmo processo e divide pelo nº de threads ocupadas (≈ por núcleo, já que
+# pbkdf2_hmac e argon2 liberam o GIL).
+import os, sys, argparse, time
+from concurrent.futures import ThreadPoolExecutor
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from passwords import HashPolicy  # noqa: E402
+
+CPF = "12345678901"
+
+CONFIGS = [
+    ("pbkdf2 200k", dict(scheme="pbkdf2", pbkdf2_iterations=200_000)),
+    ("pbkdf2 600k", dict(scheme="pbkdf2", pbkdf2_iterations=600_000)),
+    ("pbkdf2 1M", dict(scheme="pbkdf2", pbkdf2_iterations=1_000_000)),
+    ("argon2 t2 m19M", dict(scheme="argon2", argon2_time_cost=2, argon2_memory_cost=19456)),
+    ("argon2 t3 m64M", dict(scheme="argon2", argon2_time_cost=3, argon2_memory_cost=65536)),
+]
+
+
+def _loop(policy, hashval, deadline):
+    n = 0
+    while time.perf_counter() < deadline:
+        assert policy.verify(hashval, CPF)
+        n += 1
+    return n
+
+
+def bench(policy, threads, seconds):
+    hashval = policy.hash(CPF)
+    policy.verify(hashval, CPF)   # aquecimento
+    t0 = time.perf_counter()
+    deadline = t0 + seconds
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        total = sum(pool.map(lambda _: _loop(policy, hashval, deadline), range(threads)))
+    return total / (time.perf_counter() - t0)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Logins/s por esquema de hash")
+    ap.add_argument("--seconds", type=float, default=3.0)
+    ap.add_argument("--threads", default=None, help="ex.: 1,2,4 (padrão: 1 e nº de CPUs)")
+    args = ap.parse_args(argv)
+
+    cpus = os.cpu_count() or 1
+    threads = sorted({int(t) for t in args.threads.split(",")}) if args.threads else sorted({1, cpus})
+
+    print(f"CPUs: {cpus}")
+    print(f"{'configuração':<18} {'threads':>7} {'logins/s':>10} {'por núcleo':>11} {'ms/login':>9}")
+    for nome, kw in CONFIGS:
+        policy = HashPolicy(**kw)
+        for t in threads:
+            rate = bench(policy, t, args.seconds)
+            nucleos = min(t, cpus)
+            print(f"{nome:<18} {t:>7} {rate:>10.1f} {rate / nucleos:>11.1f} {1000 * nucleos / rate:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
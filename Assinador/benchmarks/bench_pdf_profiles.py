@@ -0,0 +1,78 @@
+# bench_pdf_profiles.py — Perfis de gravação do PDF assinado: tempo x tamanho
+# ------------------------------------------------------------------------------------
+# Uso (a partir de Assinador/):
+#   python benchmarks/bench_pdf_profiles.py [--repeat 5] [--mode full|incremental] [arquivo.pdf ...]
+# Sem arquivos, usa todos os PDFs de static/arquivos/uploads. Para cada perfil de
+# stamping.PDF_PROFILES mede a gravação do documento carimbado (mediana), o tamanho
+# da saída e o tempo para abrir e renderizar a 1ª página (proxy de "abrir na rede").
+import os, sys, argparse, statistics, tempfile, time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.chdir(BASE_DIR)   # stamping/assets usam caminhos relativos a static/
+
+import fitz  # noqa: E402
+import stamping  # noqa: E402
+from bench_incremental import UPLOADS_DIR, _stamps  # noqa: E402
+
+
+def _abrir_primeira_pagina(path) -> float:
+    t0 = time.perf_counter()
+    with fitz.open(path) as doc:
+        doc[0].get_pixmap(dpi=36)
+    return time.perf_counter() - t0
+
+
+def bench_file(path, repeat, mode, tmpdir):
+    qr = stamping.qr_png("https://exemplo.gov.br/verificar?crc=bench00000")
+    out = {}
+    for profile in stamping.PDF_PROFILES:
+        dst = os.path.join(tmpdir, f"{profile}.pdf")
+        tempos = []
+        for _ in range(repeat):
+            timings = {}
+            stamping.stamp_pdf(path, dst, _stamps(), qr, output_mode=mode, timings=timings, profile=profile)
+            tempos.append(timings.get("save", 0.0) + timings.get("sha", 0.0))
+        abrir = statistics.median(_abrir_primeira_pagina(dst) for _ in range(repeat))
+        out[profile] = (statistics.median(tempos) * 1000, os.path.getsize(dst), abrir * 1000)
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Tempo de gravação x tamanho por perfil de PDF")
+    ap.add_argument("arquivos", nargs="*")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--mode", choices=stamping.OUTPUT_MODES, default="full")
+    args = ap.parse_args(argv)
+
+    arquivos = args.arquivos or sorted(
+        os.path.join(UPLOADS_DIR, n) for n in os.listdir(UPLOADS_DIR) if n.lower().endswith(".pdf"))
+    stamping.warm_worker()
+    perfis = list(stamping.PDF_PROFILES)
+
+    cab = f"{'arquivo':<40} {'original':>10}"
+    for p in perfis:
+        cab += f" {p + ' ms':>11} {p + ' bytes':>13} {'abrir ms':>9}"
+    print(cab)
+    totais = {p: [0.0, 0] for p in perfis}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for path in arquivos:
+            try:
+                r = bench_file(path, args.repeat, args.mode, tmpdir)
+            except Exception as e:
+                print(f"{os.path.basename(path)[:40]:<40} erro: {e}")
+                continue
+            linha = f"{os.path.basename(path)[:40]:<40} {os.path.getsize(path):>10}"
+            for p in perfis:
+                ms, tamanho, abrir = r[p]
+                linha += f" {ms:>11.1f} {tamanho:>13} {abrir:>9.1f}"
+                totais[p][0] += ms
+                totais[p][1] += tamanho
+            print(linha)
+    print()
+    for p in perfis:
+        print(f"{p:<8} gravação total {totais[p][0]:>9.1f} ms   saída total {totais[p][1] / 2 ** 20:>8.2f} MiB")
+
+
+if __name__ == "__main__":
+    main()
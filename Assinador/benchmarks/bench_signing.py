@@ -0,0 +1,312 @@
+# bench_signing.py — Latência, memória e tamanho da saída do pipeline de assinatura
+# ------------------------------------------------------------------------------------
+# Uso (a partir de Assinador/):
+#   python benchmarks/bench_signing.py [--repeat 7] [--boxes 120,200,320] [--quick]
+#                                      [--out resultados.json] [--compare anterior.json]
+#                                      [arquivo.pdf ...]
+# Roda offline: SQLite temporário no lugar do Postgres e uma cópia de trabalho de
+# static/ (os originais de static/arquivos/uploads nunca são regravados).
+#
+# Para cada documento (PDF e imagens PNG/JPG/TIFF rasterizadas a partir dos grids) e para
+# cada tamanho de carimbo, mede as etapas de assinar():
+#   upload   -> _preparar_assinatura (grava o upload + SHA-256 + spec do carimbo)
+#   carimbo  -> stamping.sign_document
+#   registro -> _registrar_spec (INSERT em signatures)
+# e informa p50/p95 (ms), pico de RSS (MiB) por etapa e bytes da saída. Cada
+# documento roda num processo novo: o pico de RSS de um arquivo grande não
+# contamina os seguintes.
+#
+# Os resultados vão para benchmarks/results/bench_signing_<data>.json; --compare
+# mostra a variação em relação a um JSON anterior.
+import os, sys, argparse, json, math, platform, subprocess, tempfile, threading, time
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPLOADS_DIR = os.path.join(BASE_DIR, "static", "arquivos", "uploads")
+RESULTS_DIR = os.path.join(BASE_DIR, "benchmarks", "results")
+
+STAGES = ("upload", "carimbo", "registro", "total")
+CANVAS_W = 600
+QUICK_FILES = ["grid-a4.pdf", "exemplo_A4.pdf", "GuiaPraticodoArtigoCientificoAcademico.pdf"]
+# Imagens: primeira página destes PDFs rasterizada em --image-dpi (PNG, JPG e TIFF LZW)
+IMAGE_SOURCES = ["grid-a4.pdf", "grid-a2.pdf", "grid-a0.pdf"]
+IMAGE_KINDS = ("png", "jpg", "tif")
+
+
+def corpus_padrao():
+    nomes = sorted(os.listdir(UPLOADS_DIR))
+    grids = [n for n in nomes if n.startswith("grid-a") and n.endswith(".pdf")]
+    exemplos = [n for n in nomes if n.startswith("exemplo_A") and n.endswith(".pdf")]
+    plantas = [n for n in nomes if n.startswith("13T-ARQ-") and n.endswith(".pdf")]
+    return grids + exemplos + ["GuiaPraticodoArtigoCientificoAcademico.pdf"] + plantas
+
+
+# ---------------- medição de memória ----------------
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource   # sem /proc: pico do processo inteiro (kB no Linux, bytes no macOS)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+class PeakRSS:
+    """Amostra o RSS numa thread (a cada ~2 ms) e guarda o pico desde o último reset()."""
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.peak = _rss_bytes()
+        self._stop = threading.Event()
+        self._t = threading.Thread(target=self._run, daemon=True)
+        self._t.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, _rss_bytes())
+            time.sleep(self.interval)
+
+    def reset(self):
+        self.peak = _rss_bytes()
+
+    def read(self) -> int:
+        self.peak = max(self.peak, _rss_bytes())
+        return self.peak
+
+    def stop(self):
+        self._stop.set()
+        self._t.join()
+
+
+def percentil(valores, p):
+    """Percentil pelo posto mais próximo (nearest-rank)."""
+    v = sorted(valores)
+    return v[max(0, math.ceil(p / 100.0 * len(v)) - 1)]
+
+
+# ---------------- processo filho: um documento, todos os carimbos ----------------
+def _preparar_area(tmp):
+    """Cópia de trabalho: brasões/fontes por symlink, uploads/assinados vazios."""
+    os.makedirs(os.path.join(tmp, "static", "arquivos", "uploads"))
+    os.makedirs(os.path.join(tmp, "static", "arquivos", "assinados"))
+    for sub in ("brasao", "fonts"):
+        os.symlink(os.path.join(BASE_DIR, "static", sub), os.path.join(tmp, "static", sub))
+
+
+def _rasterizar(src, kind, dpi, tmp):
+    import fitz
+    with fitz.open(src) as doc:
+        pix = doc[0].get_pixmap(dpi=dpi, alpha=False)
+    dst = os.path.join(tmp, os.path.splitext(os.path.basename(src))[0] + "." + kind)
+    if kind == "png":
+        pix.save(dst)
+    elif kind == "tif":
+        pix.pil_save(dst, format="TIFF", compression="tiff_lzw")
+    else:
+        pix.pil_save(dst, format="JPEG", quality=90)
+    return dst
+
+
+def _worker(caso):
+    tmp = tempfile.mkdtemp(prefix="bench_signing_")
+    _preparar_area(tmp)
+    os.chdir(tmp)   # stamping lê brasão/fontes de static/ relativo ao cwd
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tmp, "bench.db")
+    os.environ["TEST_DATABASE_URL"] = os.environ["DATABASE_URL"]
+    os.environ["STORAGE_ROOT"] = os.path.join(tmp, "static", "arquivos")
+    sys.path.insert(0, BASE_DIR)
+
+    from werkzeug.datastructures import FileStorage, MultiDict
+    import app as appmod
+    import stamping
+
+    src = caso["src"]
+    if caso["kind"] != "pdf":
+        src = _rasterizar(src, caso["kind"], caso["image_dpi"], tmp)
+    nome = os.path.basename(src)
+
+    app = appmod.create_app("testing")
+    with app.app_context():
+        appmod.db.create_all()
+    usr = {"email": "bench@exemplo.gov.br", "nome": "Servidor de Teste", "cpf": "123.***.***-01",
+           "orgao": "SEMED", "is_admin": False}
+
+    if caso["kind"] == "pdf":
+        import fitz
+        with fitz.open(src) as doc:
+            r = doc[0].rect
+            pw, ph = r.width, r.height
+    else:
+        from PIL import Image
+        with Image.open(src) as im:
+            pw, ph = im.size
+    canvas_h = round(CANVAS_W * ph / pw)
+
+    stamping.warm_worker()
+    sampler = PeakRSS()
+    saida = {"in_bytes": os.path.getsize(src), "boxes": {}}
+    try:
+        for box in caso["boxes"]:
+            form = MultiDict({"status": "Projeto Aprovado", "processo": "0001/2025", "page": "1",
+                              "x": "40", "y": "40", "w": str(box), "h": str(box),
+                              "canvas_w": str(CANVAS_W), "canvas_h": str(canvas_h)})
+            tempos = {s: [] for s in STAGES}
+            picos = {s: 0 for s in STAGES}
+            out_bytes = 0
+            for i in range(caso["warmup"] + caso["repeat"]):
+                medido = {}
+                with app.test_request_context("/assinar", method="POST"), open(src, "rb") as f:
+                    inicio_rss = sampler.read()
+                    t0 = time.perf_counter()
+
+                    sampler.reset()
+                    t = time.perf_counter()
+                    spec = appmod._preparar_assinatura(usr, FileStorage(f, filename=nome), form)
+                    medido["upload"] = (time.perf_counter() - t, sampler.read())
+
+                    sampler.reset()
+                    t = time.perf_counter()
+                    resultado = stamping.sign_document(spec)
+                    medido["carimbo"] = (time.perf_counter() - t, sampler.read())
+                    # antes do registro: _registrar_spec publica (move) o arquivo de trabalho
+                    out_bytes = os.path.getsize(spec["signed_path"])
+
+                    sampler.reset()
+                    t = time.perf_counter()
+                    appmod._registrar_spec(spec, resultado["sha256"])
+                    medido["registro"] = (time.perf_counter() - t, sampler.read())
+
+                    medido["total"] = (time.perf_counter() - t0,
+                                       max(inicio_rss, *(m[1] for m in medido.values())))
+                if i < caso["warmup"]:
+                    continue
+                for s, (dt, pico) in medido.items():
+                    tempos[s].append(dt)
+                    picos[s] = max(picos[s], pico)
+            saida["boxes"][str(box)] = {
+                "out_bytes": out_bytes,
+                "stages": {s: {"p50_ms": percentil(tempos[s], 50) * 1000,
+                               "p95_ms": percentil(tempos[s], 95) * 1000,
+                               "peak_rss_mib": picos[s] / 2 ** 20} for s in STAGES},
+            }
+    finally:
+        sampler.stop()
+    print(json.dumps(saida))
+
+
+# ---------------- processo principal ----------------
+def _casos(args):
+    arquivos = args.arquivos or (QUICK_FILES if args.quick else corpus_padrao())
+    imagens = [] if args.no_images else (IMAGE_SOURCES[:1] if args.quick else IMAGE_SOURCES)
+    comum = {"boxes": args.boxes, "repeat": args.repeat, "warmup": args.warmup, "image_dpi": args.image_dpi}
+    casos = []
+    for nome in arquivos:
+        src = nome if os.path.isabs(nome) or os.path.exists(nome) else os.path.join(UPLOADS_DIR, nome)
+        casos.append(dict(comum, file=os.path.basename(src), kind="pdf", src=os.path.abspath(src)))
+    for nome in imagens:
+        for kind in IMAGE_KINDS:
+            casos.append(dict(comum, file=nome, kind=kind, src=os.path.join(UPLOADS_DIR, nome)))
+    return casos
+
+
+def _git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _chave(r):
+    return (r["file"], r["kind"], r["box"])
+
+
+def imprimir(resultados, anterior=None):
+    base = {_chave(r): r for r in (anterior or {}).get("results", [])}
+    cab = f"{'arquivo':<40} {'tipo':<4} {'caixa':>5} "
+    cab += " ".join(f"{s + ' p50':>12} {'p95':>8}" for s in STAGES)
+    cab += f" {'pico MiB':>9} {'saída bytes':>12}"
+    if base:
+        cab += f" {'Δ total p50':>12} {'Δ bytes':>9}"
+    print(cab)
+    for r in resultados:
+        st = r["stages"]
+        linha = f"{r['file'][:40]:<40} {r['kind']:<4} {r['box']:>5} "
+        linha += " ".join(f"{st[s]['p50_ms']:>12.1f} {st[s]['p95_ms']:>8.1f}" for s in STAGES)
+        linha += f" {st['total']['peak_rss_mib']:>9.1f} {r['out_bytes']:>12}"
+        ant = base.get(_chave(r))
+        if ant:
+            d_t = (st["total"]["p50_ms"] / ant["stages"]["total"]["p50_ms"] - 1) * 100
+            d_b = (r["out_bytes"] / ant["out_bytes"] - 1) * 100 if ant["out_bytes"] else 0.0
+            linha += f" {d_t:>+11.1f}% {d_b:>+8.1f}%"
+        elif base:
+            linha += f" {'novo':>12}"
+        print(linha)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark do pipeline de assinatura (offline, SQLite)")
+    ap.add_argument("arquivos", nargs="*", help="PDFs (padrão: corpus de static/arquivos/uploads)")
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--warmup", type=int, default=1)
+    ap.add_argument("--boxes", default="120,200,320", help="lados do carimbo no canvas de 600 px")
+    ap.add_argument("--image-dpi", type=int, default=100, help="DPI das imagens geradas a partir dos grids")
+    ap.add_argument("--no-images", action="store_true")
+    ap.add_argument("--quick", action="store_true", help="poucos arquivos, 3 repetições")
+    ap.add_argument("--out", default=None, help="JSON de saída (padrão: benchmarks/results/...)")
+    ap.add_argument("--compare", default=None, help="JSON de uma execução anterior")
+    ap.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.worker:
+        return _worker(json.loads(args.worker))
+
+    if args.quick and args.repeat == ap.get_default("repeat"):
+        args.repeat = 3
+    args.boxes = [int(b) for b in args.boxes.split(",") if b.strip()]
+
+    resultados, falhas = [], 0
+    for caso in _casos(args):
+        rotulo = f"{caso['file']} [{caso['kind']}]"
+        print(f"… {rotulo}", file=sys.stderr)
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", json.dumps(caso)],
+                             capture_output=True, text=True,
+                             env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"))
+        if out.returncode != 0:
+            erro = out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "falhou"
+            print(f"{rotulo}: erro: {erro}", file=sys.stderr)
+            falhas += 1
+            continue
+        dados = json.loads(out.stdout.strip().splitlines()[-1])
+        for box, r in dados["boxes"].items():
+            resultados.append({"file": caso["file"], "kind": caso["kind"], "box": int(box),
+                               "in_bytes": dados["in_bytes"], **r})
+
+    anterior = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            anterior = json.load(f)
+    imprimir(resultados, anterior)
+
+    import fitz, PIL
+    doc = {
+        "meta": {"created_at": datetime.now().isoformat(timespec="seconds"), "git": _git_rev(),
+                 "python": platform.python_version(), "pymupdf": fitz.VersionBind, "pillow": PIL.__version__,
+                 "platform": platform.platform(), "cpus": os.cpu_count(),
+                 "repeat": args.repeat, "warmup": args.warmup, "boxes": args.boxes,
+                 "image_dpi": args.image_dpi, "canvas_w": CANVAS_W},
+        "results": resultados,
+    }
+    out_path = args.out or os.path.join(RESULTS_DIR, f"bench_signing_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(doc, f, indent=1, ensure_ascii=False)
+    print(f"\nresultados: {out_path}")
+    if falhas:
+        print(f"{falhas} caso(s) com erro", file=sys.stderr)
+    return 1 if falhas else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# bench_startup.py — Custo de partida a frio: import + montagem da app + 1ª requisição
+# ------------------------------------------------------------------------------------
+# Uso (a partir de Assinador/):
+#   python benchmarks/bench_startup.py [--repeat 5] [--compare-ref <commit>]
+# Cada medição roda num processo Python novo (imports realmente a frio). Com
+# --compare-ref, mede também a árvore Assinador/ daquele commit (git archive), ex.:
+# o commit anterior ao create_app(). Versões antigas criam as tabelas no import:
+# DATABASE_URL precisa apontar para um banco acessível (um sqlite:///... serve se
+# o banco não exigir CITEXT).
+import os, sys, argparse, json, statistics, subprocess, tarfile, tempfile, io
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Executado no processo filho, com cwd = árvore medida
+PROBE = r"""
+import json, sys, time
+t0 = time.perf_counter()
+import app as appmod
+t_import = time.perf_counter() - t0
+t1 = time.perf_counter()
+app = appmod.create_app() if hasattr(appmod, "create_app") else appmod.app
+t_app = time.perf_counter() - t1
+t2 = time.perf_counter()
+r = app.test_client().get("/login")
+t_req = time.perf_counter() - t2
+print(json.dumps({"import": t_import, "app": t_app, "primeira_req": t_req, "status": r.status_code,
+                  "total": time.perf_counter() - t0,
+                  "fitz": "fitz" in sys.modules, "PIL": "PIL.Image" in sys.modules,
+                  "qrcode": "qrcode" in sys.modules, "modulos": len(sys.modules)}))
+"""
+
+
+def medir(arvore, repeat):
+    amostras = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", PROBE], cwd=arvore, capture_output=True,
+                             text=True, env=dict(os.environ, PYTHONDONTWRITEBYTECODE="1"))
+        if out.returncode != 0:
+            raise RuntimeError(out.stderr.strip().splitlines()[-1] if out.stderr else "falhou")
+        amostras.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    res = {k: statistics.median(a[k] for a in amostras) for k in ("import", "app", "primeira_req", "total")}
+    res.update({k: amostras[-1][k] for k in ("status", "fitz", "PIL", "qrcode", "modulos")})
+    return res
+
+
+def exportar_ref(ref, destino):
+    repo = subprocess.run(["git", "rev-parse", "--show-toplevel"], cwd=BASE_DIR,
+                          capture_output=True, text=True, check=True).stdout.strip()
+    prefixo = os.path.relpath(BASE_DIR, repo)
+    dados = subprocess.run(["git", "archive", "--format=tar", ref, prefixo], cwd=repo,
+                           capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(dados)) as tar:
+        tar.extractall(destino)
+    return os.path.join(destino, prefixo)
+
+
+def imprimir(nome, r):
+    print(f"{nome:<22} {r['import'] * 1000:>9.1f} {r['app'] * 1000:>9.1f} {r['primeira_req'] * 1000:>9.1f} "
+          f"{r['total'] * 1000:>9.1f} {r['modulos']:>8} {'sim' if r['fitz'] else 'não':>5} {r['status']:>6}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Tempo de partida a frio da aplicação")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--compare-ref", default=None, help="commit/branch para comparar (ex.: HEAD~1)")
+    args = ap.parse_args(argv)
+
+    print(f"{'árvore':<22} {'import ms':>9} {'app ms':>9} {'1ª req ms':>9} {'total ms':>9} {'módulos':>8} "
+          f"{'fitz':>5} {'status':>6}")
+    imprimir("atual", medir(BASE_DIR, args.repeat))
+    if args.compare_ref:
+        with tempfile.TemporaryDirectory() as tmp:
+            try:
+                imprimir(args.compare_ref[:22], medir(exportar_ref(args.compare_ref, tmp), args.repeat))
+            except Exception as e:
+                print(f"{args.compare_ref[:22]:<22} erro: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+# delivery.py — Entrega dos documentos assinados (download/visualização)
+# ------------------------------------------------------------------------------------
+# Arquivo assinado nunca muda: o ETag é o próprio SHA-256 gravado em signatures
+# (forte), e If-None-Match/If-Modified-Since respondem 304 sem reenviar o arquivo.
+# Range/If-Range (206) são atendidos pelo werkzeug no modo "app".
+#
+# SIGNED_FILES_DELIVERY (backend local, ver storage.py):
+#   - "app": o Flask envia o arquivo (padrão)
+#   - "x-accel": Nginx envia; a resposta leva X-Accel-Redirect: <X_ACCEL_PREFIX><partição/arquivo>
+#       location /_assinados/ {
+#           internal;
+#           alias /app/static/arquivos/assinados/;    # <STORAGE_ROOT>/assinados/
+#       }
+#   - "x-sendfile": Apache mod_xsendfile / lighttpd (X-Sendfile com o caminho absoluto)
+# Nos modos de proxy o Flask só autoriza, monta os cabeçalhos e responde 304 quando
+# cabe; o corpo (e os ranges) ficam com o servidor da frente.
+#
+# Backend S3: com STORAGE_S3_PRESIGN, redireciona (302) para uma URL pré-assinada de
+# validade curta (o S3 atende Range e o corpo não passa pela aplicação); sem ela, o
+# Flask repassa o objeto em blocos (200/304, sem Range).
+import os, mimetypes, unicodedata
+from urllib.parse import quote
+from flask import current_app, request, abort, redirect, stream_with_context
+from werkzeug.http import dump_options_header
+from werkzeug.utils import send_file
+
+from hashing import CHUNK_SIZE
+from models import Signature
+from storage import storage, normalize_key
+
+
+def signed_key(filename: str) -> str:
+    """Chave do arquivo assinado no armazenamento (404 se tentar sair de assinados/)."""
+    try:
+        return normalize_key(f"assinados/{filename}")
+    except ValueError:
+        abort(404)
+
+
+def resolve_signed_path(filename: str) -> str:
+    """Caminho absoluto do arquivo assinado no disco local (404 se não existir)."""
+    file_path = storage.local_path(signed_key(filename))
+    if file_path is None:
+        abort(404)
+    return file_path
+
+
+def download_name(filename: str, crc: str, nome_original: str) -> str:
+    """
+    Nome oferecido no download: assinado_<nome como foi enviado>_<crc><ext>. A chave no
+    armazenamento é única por assinatura (<uuid><ext>) e não serve para o usuário;
+    arquivos antigos, sem nome_original, mantêm o próprio nome.
+    """
+    if not nome_original:
+        return os.path.basename(filename)
+    raiz, ext = os.path.splitext(nome_original)
+    return f"assinado_{raiz}_{crc}{os.path.splitext(filename)[1] or ext}"
+
+
+def _registro(filename: str):
+    """(sha256, nome para download) do registro mais recente; (None, nome do arquivo) sem registro."""
+    row = (Signature.query.with_entities(Signature.sha256, Signature.crc, Signature.nome_original)
+           .filter_by(arquivo=filename).order_by(Signature.id.desc()).first())
+    if not row:
+        return None, os.path.basename(filename)
+    sha256, crc, nome_original = row
+    return sha256, download_name(filename, crc, nome_original)
+
+
+def _content_disposition(download_name: str, as_attachment: bool) -> str:
+    """Content-Disposition com filename ASCII e filename* (RFC 5987) para nomes acentuados."""
+    tipo = "attachment" if as_attachment else "inline"
+    try:
+        download_name.encode("ascii")
+        return dump_options_header(tipo, {"filename": download_name})
+    except UnicodeEncodeError:
+        simples = unicodedata.normalize("NFKD", download_name).encode("ascii", "ignore").decode("ascii")
+        return dump_options_header(tipo, {"filename": simples,
+                                          "filename*": "UTF-8''" + quote(download_name, safe="!#$&+-.^_`|~")})
+
+
+def _cache_privado(rv):
+    # Exige login: cache só no navegador, nunca em proxies compartilhados
+    rv.cache_control.public = False
+    rv.cache_control.private = True
+    return rv
+
+
+def _send_remote(filename: str, as_attachment: bool):
+    """Backend sem caminho local (S3): URL pré-assinada ou repasse em blocos."""
+    cfg = current_app.config
+    key = signed_key(filename)
+    sha256, download_name = _registro(filename)
+    if cfg.get("STORAGE_S3_PRESIGN", True):
+        return redirect(storage.presigned_url(key, expires=cfg.get("STORAGE_S3_PRESIGN_EXPIRES", 300),
+                                              content_disposition=_content_disposition(download_name, as_attachment)))
+
+    st = storage.stat(key)
+    if st is None:
+        abort(404)
+
+    def corpo():
+        # só abre o objeto se o corpo for mesmo enviado (nada é aberto num 304)
+        body = storage.open(key)
+        try:
+            for chunk in iter(lambda: body.read(CHUNK_SIZE), b""):
+                yield chunk
+        finally:
+            body.close()
+
+    rv = current_app.response_class(stream_with_context(corpo()), direct_passthrough=True,
+                                    mimetype=mimetypes.guess_type(download_name)[0] or "application/octet-stream")
+    rv.content_length = st[0]
+    rv.last_modified = int(st[1])
+    rv.set_etag(sha256 or f"{st[0]}-{int(st[1])}")
+    rv.headers["Content-Disposition"] = _content_disposition(download_name, as_attachment)
+    rv.cache_control.max_age = cfg.get("SIGNED_FILES_MAX_AGE", 3600)
+    return _cache_privado(rv.make_conditional(request.environ))
+
+
+def send_signed_file(filename: str, as_attachment: bool = True):
+    """Resposta para o arquivo assinado: ETag = SHA-256, condicionais, Range e offload ao proxy."""
+    if not storage.is_local:
+        return _send_remote(filename, as_attachment)
+    file_path = resolve_signed_path(filename)
+    rel = os.path.relpath(file_path, storage.area_dir("assinados")).replace(os.sep, "/")
+    cfg = current_app.config
+    modo = cfg.get("SIGNED_FILES_DELIVERY", "app")
+    proxy = modo in ("x-accel", "x-sendfile")
+    sha256, download_name = _registro(filename)
+
+    rv = send_file(
+        file_path, request.environ,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        etag=sha256 or True,   # sem registro: ETag do werkzeug (mtime/tamanho)
+        max_age=cfg.get("SIGNED_FILES_MAX_AGE", 3600),
+        use_x_sendfile=proxy,
+        conditional=not proxy,
+        response_class=current_app.response_class,
+    )
+    if proxy:
+        # só 200/304/412: o Range fica com o proxy
+        rv = rv.make_conditional(request.environ)
+        if modo == "x-accel":
+            rv.headers.pop("X-Sendfile", None)
+            if rv.status_code == 200:
+                rv.headers["X-Accel-Redirect"] = cfg.get("X_ACCEL_PREFIX", "/_assinados/") + quote(rel)
+        elif rv.status_code != 200:
+            rv.headers.pop("X-Sendfile", None)
+
+    return _cache_privado(rv)
@@ -0,0 +1,118 @@
+# hashing.py — SHA-256 em passada única (upload e arquivo assinado)
+import io, os, mmap, hashlib
+
+CHUNK_SIZE = 1024 * 1024   # 1 MiB: memória limitada mesmo para pranchas A0
+
+
+def sha256_of_file(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def sha256_of_stream(stream) -> str:
+    """SHA-256 lendo o stream em blocos (ex.: FileStorage.stream na verificação)."""
+    h = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+        h.update(chunk)
+    return h.hexdigest()
+
+
+def sha256_of_file_mmap(path: str) -> str:
+    """SHA-256 do arquivo via mmap: um único update sem cópias para o Python (reindexação)."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return hashlib.sha256().hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+            return hashlib.sha256(m).hexdigest()
+
+
+def _copy_hashed(stream, dest_path: str):
+    h = hashlib.sha256()
+    size = 0
+    with open(dest_path, 'wb') as out:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+            h.update(chunk)
+            out.write(chunk)
+            size += len(chunk)
+    return h, size
+
+
+def save_stream_hashed(stream, dest_path: str) -> str:
+    """
+    Grava o stream (ex.: FileStorage.stream) em disco em blocos,
+    calculando o SHA-256 na mesma passada. Retorna o hex do SHA-256.
+    """
+    h, _ = _copy_hashed(stream, dest_path)
+    return h.hexdigest()
+
+
+def copy_file_hashed(src_path: str, dest_path: str):
+    """
+    Copia src -> dest em blocos. Retorna (objeto sha256 ainda aberto, tamanho copiado),
+    para continuar o hash com o que for anexado depois (ver finish_appended_hash).
+    """
+    with open(src_path, 'rb') as f:
+        return _copy_hashed(f, dest_path)
+
+
+def finish_appended_hash(h, path: str, offset: int) -> str:
+    """Completa o SHA-256 lendo apenas os bytes anexados a partir de offset."""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class HashingWriter(io.RawIOBase):
+    """
+    Arquivo de saída que calcula o SHA-256 dos bytes à medida que são gravados.
+    Serve para doc.save(...) do PyMuPDF e imagem.save(...) do PIL.
+
+    Se o gravador voltar no arquivo (seek para trás, ex.: PDF linearizado),
+    o hash incremental deixa de valer e hexdigest() relê o arquivo.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        # Não expor ".name": o PyMuPDF usaria o caminho e gravaria por fora do writer
+        self.path = path
+        self._f = open(path, 'wb')
+        self._h = hashlib.sha256()
+        self._written = 0
+        self._rewound = False
+
+    def writable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def write(self, data):
+        if self._f.tell() != self._written:
+            self._rewound = True
+        n = self._f.write(data)
+        if not self._rewound:
+            self._h.update(data)
+        self._written = max(self._written, self._f.tell())
+        return n
+
+    def tell(self):
+        return self._f.tell()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._f.seek(offset, whence)
+
+    def close(self):
+        if not self.closed:
+            self._f.close()
+        super().close()
+
+    def hexdigest(self) -> str:
+        self.close()
+        if self._rewound:
+            return sha256_of_file(self.path)
+        return self._h.hexdigest()
@@ -0,0 +1,233 @@
+# jobs.py — Fila de assinatura em segundo plano (pool de processos com PyMuPDF aquecido)
+# ------------------------------------------------------------------------------------
+# O POST /assinar/async grava o upload, enfileira a spec do carimbo e devolve um job_id;
+# o carimbo (stamping.sign_document) roda num pool cujo initializer já carregou
+# fitz, fontes e brasão. O cliente consulta /assinar/jobs/<job_id>.
+#
+# Estado dos jobs:
+#   - "memory": dict em processo (dev/testes, ou um único worker)
+#   - "sqlite:///caminho.db": arquivo SQLite visto por todos os workers do gunicorn
+#
+# Falhas:
+#   - worker do pool morto (ex.: OOM num PDF enorme): o ProcessPoolExecutor fica quebrado
+#     (BrokenProcessPool) para sempre; os jobs afetados viram "error" e o pool é
+#     descartado e recriado no próximo envio.
+#   - processo web morto com jobs na fila: ninguém mais os conclui; passados
+#     SIGNING_JOB_MAX_AGE segundos em "queued", viram "error".
+import os, json, sqlite3, threading, time, uuid
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor
+
+JOB_TTL_SECONDS = 3600   # jobs concluídos são descartados após 1h
+STALE_ERROR = "Job abandonado: o processo que o executava foi encerrado."
+
+
+def _now() -> float:
+    return time.time()
+
+
+class MemoryJobStore:
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, owner: str):
+        with self._lock:
+            self._jobs[job_id] = {"id": job_id, "owner": owner, "status": "queued",
+                                  "result": None, "error": None,
+                                  "created_at": _now(), "updated_at": _now()}
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields, updated_at=_now())
+
+    def get(self, job_id: str):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def purge(self, older_than: float, queued_before: float):
+        with self._lock:
+            for job in self._jobs.values():
+                if job["status"] == "queued" and job["created_at"] < queued_before:
+                    job.update(status="error", error=STALE_ERROR, updated_at=_now())
+            for job_id in [k for k, j in self._jobs.items()
+                           if j["status"] != "queued" and j["updated_at"] < older_than]:
+                del self._jobs[job_id]
+
+
+class SQLiteJobStore:
+    def __init__(self, path: str):
+        self.path = path
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        with self._conn() as cx:
+            cx.execute("""CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY, owner TEXT, status TEXT NOT NULL,
+                result TEXT, error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)""")
+
+    def _conn(self):
+        # uma conexão por operação: seguro entre threads e processos
+        return sqlite3.connect(self.path, timeout=10)
+
+    def create(self, job_id: str, owner: str):
+        with self._conn() as cx:
+            cx.execute("INSERT INTO jobs (id, owner, status, created_at, updated_at) VALUES (?, ?, 'queued', ?, ?)",
+                       (job_id, owner, _now(), _now()))
+
+    def update(self, job_id: str, **fields):
+        if "result" in fields:
+            fields["result"] = json.dumps(fields["result"])
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        with self._conn() as cx:
+            cx.execute(f"UPDATE jobs SET {cols}, updated_at = ? WHERE id = ?",
+                       (*fields.values(), _now(), job_id))
+
+    def get(self, job_id: str):
+        with self._conn() as cx:
+            cx.row_factory = sqlite3.Row
+            row = cx.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if not row:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def purge(self, older_than: float, queued_before: float):
+        with self._conn() as cx:
+            cx.execute("UPDATE jobs SET status = 'error', error = ?, updated_at = ? "
+                       "WHERE status = 'queued' AND created_at < ?", (STALE_ERROR, _now(), queued_before))
+            cx.execute("DELETE FROM jobs WHERE status != 'queued' AND updated_at < ?", (older_than,))
+
+
+def make_job_store(url: str):
+    if url.startswith("sqlite:///"):
+        return SQLiteJobStore(url[len("sqlite:///"):])
+    return MemoryJobStore()
+
+
+class SigningQueue:
+    """
+    Extensão Flask: init_app(app) lê SIGNING_EXECUTOR, SIGNING_WORKERS, SIGNING_JOB_STORE
+    e SIGNING_JOB_MAX_AGE.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.store = None
+        self._executor = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("SIGNING_EXECUTOR", "process")
+        app.config.setdefault("SIGNING_WORKERS", os.cpu_count() or 2)
+        app.config.setdefault("SIGNING_JOB_STORE", "memory")
+        app.config.setdefault("SIGNING_JOB_MAX_AGE", 1800)
+        self.app = app
+        self.store = make_job_store(app.config["SIGNING_JOB_STORE"])
+        app.extensions["signing_queue"] = self
+
+    @property
+    def executor(self):
+        # criado sob demanda: quem só faz login/verificação não sobe o pool
+        # (nem importa PyMuPDF/PIL)
+        import stamping
+        with self._lock:
+            if self._executor is None:
+                workers = int(self.app.config["SIGNING_WORKERS"])
+                if self.app.config["SIGNING_EXECUTOR"] == "thread":
+                    self._executor = ThreadPoolExecutor(max_workers=workers,
+                                                        initializer=stamping.warm_worker)
+                else:
+                    self._executor = ProcessPoolExecutor(max_workers=workers,
+                                                         initializer=stamping.warm_worker)
+            return self._executor
+
+    def _descartar(self, quebrado):
+        """Tira de uso o pool quebrado (só se ainda for o atual); o próximo envio cria outro."""
+        with self._lock:
+            if self._executor is not quebrado:
+                return
+            self._executor = None
+        quebrado.shutdown(wait=False, cancel_futures=True)
+
+    def sign(self, spec: dict):
+        """
+        Future de stamping.sign_document(spec) no pool. Pool quebrado (BrokenProcessPool)
+        é recriado: no envio, tenta de novo num pool novo; se quebrar com a tarefa já
+        enviada, a future falha (o chamador marca o erro) e o pool é descartado.
+        """
+        import stamping
+        for tentativa in range(2):
+            executor = self.executor
+            try:
+                fut = executor.submit(stamping.sign_document, spec)
+            except BrokenExecutor:
+                self._descartar(executor)
+                if tentativa:
+                    raise
+                continue
+
+            def _quebrou(f, executor=executor):
+                if not f.cancelled() and isinstance(f.exception(), BrokenExecutor):
+                    self._descartar(executor)
+
+            fut.add_done_callback(_quebrou)
+            return fut
+
+    def _expirar(self):
+        cfg = self.app.config
+        self.store.purge(_now() - JOB_TTL_SECONDS, _now() - cfg["SIGNING_JOB_MAX_AGE"])
+
+    def submit(self, spec: dict, owner: str, on_done=None, on_error=None) -> str:
+        """
+        Enfileira a spec e devolve o job_id. on_done(spec, resultado) roda no processo
+        web, com app context, antes do job ser marcado como "done" (ex.: gravar Signature);
+        on_error(spec, exc), idem, quando o carimbo ou o on_done falham.
+        """
+        job_id = uuid.uuid4().hex
+        self._expirar()
+        self.store.create(job_id, owner)
+        try:
+            fut = self.sign(spec)
+        except Exception as e:
+            self.store.update(job_id, status="error", error=str(e))
+            if on_error:
+                on_error(spec, e)
+            return job_id
+
+        def _callback(f):
+            try:
+                resultado = f.result()
+                if on_done:
+                    with self.app.app_context():
+                        on_done(spec, resultado)
+                self.store.update(job_id, status="done", result=resultado)
+            except Exception as e:
+                self.store.update(job_id, status="error", error=str(e))
+                if on_error:
+                    with self.app.app_context():
+                        on_error(spec, e)
+
+        fut.add_done_callback(_callback)
+        return job_id
+
+    def get(self, job_id: str):
+        job = self.store.get(job_id)
+        limite = _now() - self.app.config["SIGNING_JOB_MAX_AGE"]
+        if job and job["status"] == "queued" and job["created_at"] < limite:
+            self._expirar()
+            job = self.store.get(job_id)
+        return job
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+signing_queue = SigningQueue()
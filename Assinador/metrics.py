@@ -0,0 +1,152 @@
+# metrics.py — Tempos por etapa (histogramas), contadores, /metrics e Server-Timing
+# ------------------------------------------------------------------------------------
+# Uso nas rotas:
+#   with metrics.timer("assinar", "upload"):
+#       ...
+#   metrics.observe("assinar", "draw", 0.012)      # tempo medido em outro lugar (pool)
+#   metrics.count("login", "ok")
+#
+# Exposição:
+#   GET /metrics  -> formato texto do Prometheus (0.0.4)
+#       assinador_stage_seconds{op,stage}   histograma
+#       assinador_operations_total{op,result} contador
+#   Server-Timing em cada resposta, com as etapas medidas na própria requisição
+#   (aparece na aba Network/Timing do devtools).
+#
+# Config: METRICS_ENABLED, METRICS_TOKEN (se definido, /metrics exige
+# "Authorization: Bearer <token>"), METRICS_PUBLIC, SERVER_TIMING.
+# Sem token, /metrics só responde a conexões de loopback (403 para as demais); abrir
+# para qualquer origem exige METRICS_PUBLIC=1. Atrás de proxy reverso, configure
+# TRUSTED_PROXIES para que o IP do cliente (e não o do proxy) seja o avaliado.
+# Os valores ficam em memória por processo: com vários workers do gunicorn, cada
+# scrape vê o worker que atendeu (use o label "instance" do Prometheus por porta/worker).
+import bisect, ipaddress, secrets, threading, time
+from contextlib import contextmanager
+from flask import g, has_request_context, request, current_app, Response, abort
+
+# Em segundos: de operações de banco (ms) até pranchas A0 / hash de login (s)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_HELP = "Tempo por etapa das operações (upload, hash, carimbo, banco...)"
+OPS_HELP = "Operações concluídas por resultado"
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(v: float) -> str:
+    return "+Inf" if v == float("inf") else repr(float(v))
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)   # último = acima do maior bucket
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def lines(self, name: str, labels: str):
+        acum = 0
+        for le, n in zip(self.buckets + (float("inf"),), self.counts):
+            acum += n
+            yield f'{name}_bucket{{{labels},le="{_fmt(le)}"}} {acum}'
+        yield f"{name}_sum{{{labels}}} {self.sum!r}"
+        yield f"{name}_count{{{labels}}} {acum}"
+
+
+def _loopback(addr) -> bool:
+    try:
+        return ipaddress.ip_address(addr or "").is_loopback
+    except ValueError:
+        return False
+
+
+class Metrics:
+    """Registro em memória (thread-safe) + hooks do Flask para /metrics e Server-Timing."""
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._stages = {}     # (op, stage) -> Histogram
+        self._ops = {}        # (op, result) -> int
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("METRICS_ENABLED", True)
+        app.config.setdefault("METRICS_TOKEN", "")
+        app.config.setdefault("METRICS_PUBLIC", False)
+        app.config.setdefault("SERVER_TIMING", True)
+        app.extensions["metrics"] = self
+        app.after_request(self._server_timing)
+        if app.config["METRICS_ENABLED"]:
+            app.add_url_rule("/metrics", "metrics", self.view, methods=["GET"])
+
+    # ---------------- registro ----------------
+    def observe(self, op: str, stage: str, seconds: float):
+        with self._lock:
+            h = self._stages.get((op, stage))
+            if h is None:
+                h = self._stages[(op, stage)] = Histogram()
+            h.observe(seconds)
+        if has_request_context():
+            g.setdefault("_server_timing", []).append((stage, seconds))
+
+    def observe_many(self, op: str, timings: dict):
+        for stage, seconds in (timings or {}).items():
+            self.observe(op, stage, seconds)
+
+    @contextmanager
+    def timer(self, op: str, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(op, stage, time.perf_counter() - t0)
+
+    def count(self, op: str, result: str, n: int = 1):
+        with self._lock:
+            self._ops[(op, result)] = self._ops.get((op, result), 0) + n
+
+    # ---------------- exposição ----------------
+    def render(self) -> str:
+        with self._lock:
+            stages = sorted(self._stages.items())
+            ops = sorted(self._ops.items())
+            linhas = [f"# HELP assinador_stage_seconds {STAGE_HELP}",
+                      "# TYPE assinador_stage_seconds histogram"]
+            for (op, stage), h in stages:
+                linhas.extend(h.lines("assinador_stage_seconds",
+                                      f'op="{_escape(op)}",stage="{_escape(stage)}"'))
+            linhas += [f"# HELP assinador_operations_total {OPS_HELP}",
+                       "# TYPE assinador_operations_total counter"]
+            for (op, result), n in ops:
+                linhas.append(f'assinador_operations_total{{op="{_escape(op)}",result="{_escape(result)}"}} {n}')
+        return "\n".join(linhas) + "\n"
+
+    def view(self):
+        token = current_app.config.get("METRICS_TOKEN")
+        if token:
+            enviado = request.headers.get("Authorization", "")
+            if not secrets.compare_digest(enviado, f"Bearer {token}"):
+                abort(401)
+        elif not current_app.config.get("METRICS_PUBLIC") and not _loopback(request.remote_addr):
+            abort(403)
+        return Response(self.render(), mimetype="text/plain; version=0.0.4; charset=utf-8")
+
+    def _server_timing(self, response):
+        etapas = g.pop("_server_timing", None)
+        if etapas and current_app.config.get("SERVER_TIMING", True):
+            # mesma etapa repetida (ex.: lote) vira uma entrada com a soma
+            total = {}
+            for stage, seconds in etapas:
+                total[stage] = total.get(stage, 0.0) + seconds
+            response.headers.add("Server-Timing",
+                                 ", ".join(f"{s};dur={d * 1000:.1f}" for s, d in total.items()))
+        return response
+
+
+metrics = Metrics()
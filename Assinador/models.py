@@ -1,15 +1,19 @@
 # models.py
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func
+from sqlalchemy import func, text
 from sqlalchemy.dialects.postgresql import CITEXT  # requer extensão citext no Postgres
 
 db = SQLAlchemy()
 
+# E-mail sem diferenciar maiúsculas: CITEXT no Postgres; no SQLite (benchmarks/dev
+# offline) um VARCHAR com COLLATE NOCASE faz o mesmo papel
+EmailText = CITEXT().with_variant(db.String(320, collation="NOCASE"), "sqlite")
+
 class User(db.Model):
     __tablename__ = "users"
 
     id          = db.Column(db.Integer, primary_key=True)
-    email       = db.Column(CITEXT, unique=True, nullable=False, index=True)
+    email       = db.Column(EmailText, unique=True, nullable=False, index=True)
     nome        = db.Column(db.String(255), nullable=False)
 
     # CPF protegido
@@ -28,6 +32,22 @@ class User(db.Model):
     updated_at  = db.Column(db.DateTime(timezone=True), server_default=func.now(),
                             onupdate=func.now(), nullable=False)
 
+    # Listagem do /cadastro: paginação por (created_at, id) e busca ILIKE '%termo%'
+    # (trigram, só Postgres; requer CREATE EXTENSION pg_trgm — ver init.sql)
+    __table_args__ = (
+        db.Index("ix_users_created_at_id", "created_at", "id"),
+        db.Index("ix_users_nome_trgm", "nome", postgresql_using="gin",
+                 postgresql_ops={"nome": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        db.Index("ix_users_email_trgm", text("(email::text) gin_trgm_ops"),
+                 postgresql_using="gin").ddl_if(dialect="postgresql"),
+        db.Index("ix_users_orgao_trgm", "orgao", postgresql_using="gin",
+                 postgresql_ops={"orgao": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        db.Index("ix_users_setor_trgm", "setor", postgresql_using="gin",
+                 postgresql_ops={"setor": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+        db.Index("ix_users_matricula_trgm", "matricula", postgresql_using="gin",
+                 postgresql_ops={"matricula": "gin_trgm_ops"}).ddl_if(dialect="postgresql"),
+    )
+
     def to_dict(self):
         return {
             "id": self.id,
@@ -45,3 +65,59 @@ class User(db.Model):
 
     def __repr__(self):
         return f"<User {self.email}>"
+
+
+class Signature(db.Model):
+    """Registro de cada documento assinado (consulta indexada por CRC/SHA-256)."""
+    __tablename__ = "signatures"
+
+    id          = db.Column(db.Integer, primary_key=True)
+    crc         = db.Column(db.String(64), nullable=False, index=True)   # CRC curto da assinatura (URL/QR)
+    sha256      = db.Column(db.String(64), nullable=False, index=True)   # SHA-256 do arquivo assinado
+    arquivo     = db.Column(db.String(512), nullable=False, index=True)  # nome na área "assinados" do armazenamento (storage.py)
+    tamanho     = db.Column(db.BigInteger)                               # bytes do arquivo assinado
+    mtime       = db.Column(db.Float)                                    # os.stat().st_mtime (reindexação incremental)
+    original_sha256 = db.Column(db.String(64), index=True)               # SHA-256 do original (uploads/<sha256><ext>)
+    nome_original   = db.Column(db.String(255))                          # nome do arquivo como o usuário enviou
+
+    # Signatário (cópia dos dados no momento da assinatura)
+    signatario_email = db.Column(EmailText)
+    signatario_nome  = db.Column(db.String(255))
+    signatario_cpf   = db.Column(db.String(32))                          # CPF mascarado
+    orgao       = db.Column(db.String(120))
+    processo    = db.Column(db.String(120))
+
+    created_at  = db.Column(db.DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "crc": self.crc,
+            "sha256": self.sha256,
+            "arquivo": self.arquivo,
+            "tamanho": self.tamanho,
+            "original_sha256": self.original_sha256,
+            "nome_original": self.nome_original,
+            "signatario_email": self.signatario_email,
+            "signatario_nome": self.signatario_nome,
+            "signatario_cpf": self.signatario_cpf,
+            "orgao": self.orgao,
+            "processo": self.processo,
+            "created_at": self.created_at.isoformat() if self.created_at else None,
+        }
+
+    def __repr__(self):
+        return f"<Signature {self.crc} {self.arquivo}>"
+
+
+class RateLimitEntry(db.Model):
+    """Tentativas por chave (RATELIMIT_STORE="database"; compartilhado entre workers)."""
+    __tablename__ = "rate_limits"
+
+    key         = db.Column(db.String(320), primary_key=True)               # ex.: "login:email|ip"
+    count       = db.Column(db.Integer, nullable=False, default=0)
+    lock_until  = db.Column(db.BigInteger, nullable=False, default=0)        # epoch (s)
+    expires_at  = db.Column(db.BigInteger, nullable=False, index=True)       # epoch (s); linha descartável depois disso
+
+    def __repr__(self):
+        return f"<RateLimitEntry {self.key} {self.count}>"
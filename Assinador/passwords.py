@@ -0,0 +1,154 @@
+# passwords.py — Hash do CPF de login (PBKDF2 ou Argon2) fora da thread da requisição
+# ------------------------------------------------------------------------------------
+# PASSWORD_HASH_SCHEME: "pbkdf2" (werkzeug, PBKDF2_ITERATIONS) ou "argon2"
+#   (argon2id; ARGON2_TIME_COST, ARGON2_MEMORY_COST em KiB, ARGON2_PARALLELISM).
+# Hashes gravados com outro esquema/custo continuam válidos e são regravados com os
+# parâmetros atuais no próximo login bem-sucedido (verify_and_update).
+#
+# A verificação roda num pool pequeno (PASSWORD_HASH_WORKERS); pbkdf2_hmac e argon2
+# liberam o GIL, então o pool usa CPU real sem bloquear as demais threads. Com mais de
+# PASSWORD_HASH_QUEUE verificações pendentes, novas tentativas recebem HashBusy em vez
+# de empilhar CPU na frente das assinaturas. A importação em lote (hash_many) usa o
+# mesmo pool, com no máximo PASSWORD_HASH_WORKERS hashes pendentes por vez: um login
+# nunca espera a planilha inteira.
+import os, threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from werkzeug.security import generate_password_hash, check_password_hash, DEFAULT_PBKDF2_ITERATIONS
+import argon2
+
+SCHEMES = ("pbkdf2", "argon2")
+
+
+class HashBusy(RuntimeError):
+    """Fila de verificação cheia: o cliente deve tentar de novo em instantes."""
+
+
+class HashPolicy:
+    """Esquema e custo atuais; hash/verify/needs_rehash sem estado (usável no pool ou no benchmark)."""
+
+    def __init__(self, scheme="pbkdf2", pbkdf2_iterations=DEFAULT_PBKDF2_ITERATIONS,
+                 argon2_time_cost=3, argon2_memory_cost=65536, argon2_parallelism=1):
+        if scheme not in SCHEMES:
+            raise ValueError(f"PASSWORD_HASH_SCHEME inválido: {scheme!r} (use {', '.join(SCHEMES)}).")
+        self.scheme = scheme
+        self.pbkdf2_method = f"pbkdf2:sha256:{int(pbkdf2_iterations)}"
+        self.argon2 = argon2.PasswordHasher(time_cost=int(argon2_time_cost),
+                                            memory_cost=int(argon2_memory_cost),
+                                            parallelism=int(argon2_parallelism))
+
+    def __repr__(self):
+        if self.scheme == "argon2":
+            p = self.argon2
+            return f"argon2id(t={p.time_cost}, m={p.memory_cost}KiB, p={p.parallelism})"
+        return self.pbkdf2_method
+
+    def hash(self, texto: str) -> str:
+        if self.scheme == "argon2":
+            return self.argon2.hash(texto)
+        return generate_password_hash(texto, method=self.pbkdf2_method, salt_length=16)
+
+    def verify(self, hashval: str, texto: str) -> bool:
+        hashval = hashval or ""
+        try:
+            if hashval.startswith("$argon2"):
+                return self.argon2.verify(hashval, texto or "")
+            return check_password_hash(hashval, texto or "")
+        except Exception:   # argon2 levanta VerifyMismatchError/InvalidHashError
+            return False
+
+    def needs_rehash(self, hashval: str) -> bool:
+        hashval = hashval or ""
+        if self.scheme == "argon2":
+            return not hashval.startswith("$argon2") or self.argon2.check_needs_rehash(hashval)
+        return hashval.split("$", 1)[0] != self.pbkdf2_method
+
+    def verify_and_update(self, hashval: str, texto: str):
+        """(ok, novo_hash | None): novo_hash só quando ok e o hash gravado está desatualizado."""
+        if not self.verify(hashval, texto):
+            return False, None
+        return True, (self.hash(texto) if self.needs_rehash(hashval) else None)
+
+
+class PasswordHashing:
+    """Extensão Flask: init_app(app) lê PASSWORD_HASH_* / PBKDF2_* / ARGON2_*."""
+
+    def __init__(self, app=None):
+        self.policy = HashPolicy()
+        self.workers = 2
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        c = app.config
+        c.setdefault("PASSWORD_HASH_SCHEME", "pbkdf2")
+        c.setdefault("PBKDF2_ITERATIONS", DEFAULT_PBKDF2_ITERATIONS)
+        c.setdefault("ARGON2_TIME_COST", 3)
+        c.setdefault("ARGON2_MEMORY_COST", 65536)
+        c.setdefault("ARGON2_PARALLELISM", 1)
+        c.setdefault("PASSWORD_HASH_WORKERS", max(1, (os.cpu_count() or 2) // 2))
+        c.setdefault("PASSWORD_HASH_QUEUE", 64)
+        self.policy = HashPolicy(c["PASSWORD_HASH_SCHEME"], c["PBKDF2_ITERATIONS"], c["ARGON2_TIME_COST"],
+                                 c["ARGON2_MEMORY_COST"], c["ARGON2_PARALLELISM"])
+        self.workers = int(c["PASSWORD_HASH_WORKERS"])
+        self._slots = threading.BoundedSemaphore(self.workers + int(c["PASSWORD_HASH_QUEUE"]))
+        app.extensions["password_hashing"] = self
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix="pwhash")
+            return self._executor
+
+    def hash(self, texto: str) -> str:
+        return self.policy.hash(texto)
+
+    def hash_many(self, textos) -> list:
+        """
+        Hashes de vários textos (importação em lote), na ordem, no pool do login. Cada hash
+        ocupa uma vaga da fila (sem timeout: a importação espera, o login não) e nunca há
+        mais de `workers` pendentes; sem init_app, roda na própria thread.
+        """
+        textos = list(textos)
+        if self._slots is None:
+            return [self.policy.hash(t) for t in textos]
+        hashes, pendentes = [None] * len(textos), {}
+        for i, texto in enumerate(textos):
+            if len(pendentes) >= self.workers:
+                prontos, _ = wait(pendentes, return_when=FIRST_COMPLETED)
+                for f in prontos:
+                    hashes[pendentes.pop(f)] = f.result()
+            self._slots.acquire()
+            fut = self.executor.submit(self.policy.hash, texto)
+            fut.add_done_callback(lambda f: self._slots.release())
+            pendentes[fut] = i
+        for f, i in pendentes.items():
+            hashes[i] = f.result()
+        return hashes
+
+    def verify_and_update(self, hashval: str, texto: str, timeout: float = 1.0):
+        """
+        Executa policy.verify_and_update no pool. Espera até timeout segundos por uma
+        vaga na fila; sem vaga, levanta HashBusy.
+        """
+        if self._slots is None:   # sem init_app (scripts): roda na própria thread
+            return self.policy.verify_and_update(hashval, texto)
+        if not self._slots.acquire(timeout=timeout):
+            raise HashBusy("Muitos acessos simultâneos. Tente novamente em instantes.")
+        try:
+            return self.executor.submit(self.policy.verify_and_update, hashval, texto).result()
+        finally:
+            self._slots.release()
+
+    def shutdown(self, wait: bool = True):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+password_hashing = PasswordHashing()
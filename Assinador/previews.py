@@ -0,0 +1,186 @@
+# previews.py — Pré-visualização de PDF no servidor (metadados + páginas renderizadas)
+# ------------------------------------------------------------------------------------
+# Em vez de baixar o pdf.js e rasterizar o documento inteiro no navegador (pranchas A0
+# em PCs modestos), a tela de assinatura envia o PDF (ou TIFF, que o navegador não
+# exibe) uma vez e recebe:
+#   POST /assinar/preview                       -> {sha256, page_count, pages: [{w, h}]}
+#   GET  /assinar/preview/<sha256>              -> os mesmos metadados
+#   GET  /assinar/preview/<sha256>/<n>.png?dpi= -> PNG da página n (1-based)
+#
+# Cache em disco (PREVIEW_DIR, padrão data/previews/), por SHA-256 do arquivo:
+#   <sha[:2]>/<sha>.pdf | .tiff        original (nome = conteúdo, não se repete)
+#   <sha[:2]>/<sha>.json               metadados das páginas
+#   <sha[:2]>/<sha>_p<n>_<dpi>.png     página renderizada
+# Tudo é gravado em arquivo temporário + os.replace (leitores nunca veem arquivo pela
+# metade). O DPI é arredondado para PREVIEW_DPI_STEP e limitado por PREVIEW_MAX_DPI e
+# PREVIEW_MAX_PIXELS, para que telas parecidas reaproveitem a mesma imagem.
+# Arquivos sem acesso há PREVIEW_TTL segundos são removidos (no máximo 1x a cada 10 min).
+import os, re, json, time, tempfile
+from flask import current_app, request, abort
+from werkzeug.utils import send_file
+
+from hashing import save_stream_hashed
+
+SHA_RE = re.compile(r"[0-9a-f]{64}")
+TIPOS = {".pdf": "pdf", ".tif": "tiff", ".tiff": "tiff"}   # extensão -> filetype do PyMuPDF
+LIMPEZA_INTERVALO = 600
+_ultima_limpeza = 0.0
+
+
+def preview_dir() -> str:
+    return current_app.config.get("PREVIEW_DIR") or os.path.join(current_app.root_path, "data", "previews")
+
+
+def _caminho(sha: str, sufixo: str) -> str:
+    if not SHA_RE.fullmatch(sha or ""):
+        abort(404)
+    return os.path.join(preview_dir(), sha[:2], sha + sufixo)
+
+
+def _gravar_atomico(destino: str, dados: bytes):
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(destino), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(dados)
+        os.replace(tmp, destino)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _tocar(*caminhos):
+    """Atualiza o mtime (último uso) — é por ele que limpar_previews decide."""
+    for caminho in caminhos:
+        try:
+            os.utime(caminho)
+        except FileNotFoundError:
+            pass
+
+
+def _ler_metadados(path: str, tipo: str) -> dict:
+    import fitz   # PyMuPDF só quando há documento para abrir
+    try:
+        doc = fitz.open(path, filetype=tipo)
+    except Exception:
+        raise ValueError(f"Não foi possível abrir o {tipo.upper()}.")
+    with doc:
+        # page.rect já considera a rotação: é o mesmo retângulo usado no carimbo
+        # (TIFF: proporção da página em pixels, que é o que o carimbo de imagem usa)
+        pages = [{"w": round(p.rect.width, 2), "h": round(p.rect.height, 2)} for p in doc]
+    return {"tipo": tipo, "page_count": len(pages), "pages": pages}
+
+
+def guardar_original(stream, nome_arquivo: str = "") -> dict:
+    """
+    Grava o PDF/TIFF no cache (se ainda não estiver lá) e devolve {sha256, tipo, page_count, pages}.
+    ValueError se o arquivo não abrir no formato da extensão.
+    """
+    tipo = TIPOS.get(os.path.splitext(nome_arquivo or "")[1].lower(), "pdf")
+    base = preview_dir()
+    os.makedirs(base, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=base, suffix=".upload")
+    os.close(fd)
+    try:
+        sha = save_stream_hashed(stream, tmp)
+        orig_path = _caminho(sha, "." + tipo)
+        meta_path = _caminho(sha, ".json")
+        if os.path.isfile(meta_path) and os.path.isfile(orig_path):
+            _tocar(orig_path, meta_path)
+            with open(meta_path, "r", encoding="utf-8") as f:
+                return dict(json.load(f), sha256=sha)
+        meta = _ler_metadados(tmp, tipo)
+        os.makedirs(os.path.dirname(orig_path), exist_ok=True)
+        os.replace(tmp, orig_path)
+        _gravar_atomico(meta_path, json.dumps(meta).encode("utf-8"))
+        return dict(meta, sha256=sha)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        _limpar_se_preciso()
+
+
+def metadados(sha: str) -> dict:
+    meta_path = _caminho(sha, ".json")
+    if not os.path.isfile(meta_path):
+        abort(404)
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return dict(json.load(f), sha256=sha)
+
+
+def _dpi_efetivo(dpi: float, w_pt: float, h_pt: float) -> int:
+    cfg = current_app.config
+    passo = max(1, cfg.get("PREVIEW_DPI_STEP", 12))
+    dpi = max(cfg.get("PREVIEW_MIN_DPI", 24), min(cfg.get("PREVIEW_MAX_DPI", 200), dpi))
+    # teto de pixels: uma A0 a 200 dpi passaria de 60 Mpx
+    max_px = cfg.get("PREVIEW_MAX_PIXELS", 4_000_000)
+    px = (w_pt / 72.0 * dpi) * (h_pt / 72.0 * dpi)
+    if px > max_px:
+        dpi *= (max_px / px) ** 0.5
+    return max(passo, int(dpi // passo) * passo)
+
+
+def renderizar_pagina(sha: str, page_num: int, dpi: float) -> str:
+    """Caminho do PNG da página (renderiza e grava no cache na primeira vez)."""
+    meta = metadados(sha)
+    if not 1 <= page_num <= meta["page_count"]:
+        abort(404)
+    pg = meta["pages"][page_num - 1]
+    dpi = _dpi_efetivo(dpi, pg["w"], pg["h"])
+    png_path = _caminho(sha, f"_p{page_num}_{dpi}.png")
+    if os.path.isfile(png_path):
+        _tocar(png_path)
+        return png_path
+
+    tipo = meta.get("tipo", "pdf")
+    orig_path = _caminho(sha, "." + tipo)
+    if not os.path.isfile(orig_path):
+        abort(404)
+    import fitz
+    with fitz.open(orig_path, filetype=tipo) as doc:
+        pix = doc[page_num - 1].get_pixmap(dpi=dpi, alpha=False)
+        _gravar_atomico(png_path, pix.tobytes("png"))
+    _tocar(orig_path, _caminho(sha, ".json"))   # mantém o original vivo enquanto houver uso
+    return png_path
+
+
+def _limpar_se_preciso():
+    global _ultima_limpeza
+    agora = time.time()
+    if agora - _ultima_limpeza < LIMPEZA_INTERVALO:
+        return
+    _ultima_limpeza = agora
+    limpar_previews(current_app.config.get("PREVIEW_TTL", 86400))
+
+
+def limpar_previews(ttl: int, base: str = None) -> int:
+    """Remove arquivos do cache sem uso há mais de ttl segundos. Devolve quantos removeu."""
+    base = base or preview_dir()
+    limite = time.time() - ttl
+    removidos = 0
+    for raiz, _, arquivos in os.walk(base):
+        for nome in arquivos:
+            caminho = os.path.join(raiz, nome)
+            try:
+                if os.stat(caminho).st_mtime < limite:
+                    os.remove(caminho)
+                    removidos += 1
+            except FileNotFoundError:
+                pass
+    return removidos
+
+
+def send_page_png(sha: str, page_num: int):
+    try:
+        dpi = float(request.args.get("dpi") or 96)
+    except ValueError:
+        dpi = 96.0
+    png_path = renderizar_pagina(sha, page_num, dpi)
+    rv = send_file(png_path, request.environ, mimetype="image/png",
+                   etag=os.path.basename(png_path)[:-4],   # sha + página + dpi: imutável
+                   max_age=current_app.config.get("PREVIEW_MAX_AGE", 86400),
+                   response_class=current_app.response_class)
+    rv.cache_control.public = False
+    rv.cache_control.private = True
+    rv.cache_control.immutable = True
+    return rv
@@ -0,0 +1,248 @@
+# ratelimit.py — Contagem de tentativas com bloqueio temporário (login e afins)
+# ------------------------------------------------------------------------------------
+# Cada chave (ex.: "login:email|ip") guarda: tentativas, bloqueado_até e expira_em.
+# A janela é fixa: começa na primeira tentativa e expira_em não anda com as seguintes;
+# passado expira_em, a contagem recomeça do zero.
+# A política (limite, tempo de bloqueio, janela) vem de quem chama; o store só garante
+# atomicidade, expiração (TTL) e teto de memória.
+#
+# RATELIMIT_STORE:
+#   - "memory": dict em processo, com TTL e teto RATELIMIT_MAX_ENTRIES (um worker / dev)
+#   - "sqlite:///caminho.db": arquivo SQLite visto por todos os workers do gunicorn
+#   - "database": tabela rate_limits no banco da aplicação (Postgres; vários hosts)
+import os, sqlite3, threading, time
+from collections import OrderedDict
+from sqlalchemy import select, delete, func
+from sqlalchemy.exc import IntegrityError
+
+from models import db, RateLimitEntry
+
+PURGE_EVERY = 256   # hits entre varreduras de chaves expiradas (stores compartilhados)
+
+
+def _now() -> int:
+    return int(time.time())
+
+
+def _apply_fail(count, lock_until, expires_at, now, max_attempts, lockout_seconds, window):
+    """Regra comum: (count, lock_until, expires_at) após uma falha."""
+    if expires_at <= now:   # janela vencida (ou chave nova): abre outra
+        count, expires_at = 0, now + window
+    count += 1
+    if count >= max_attempts:
+        lock_until = now + lockout_seconds
+        count = 0
+    return count, lock_until, max(lock_until, expires_at)
+
+
+class MemoryLimiterStore:
+    """
+    OrderedDict em ordem de uso. Passando de max_entries, descarta primeiro as chaves
+    expiradas e depois as menos recentes (o dict nunca cresce sem limite).
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()   # key -> [count, lock_until, expires_at]
+        self._lock = threading.Lock()
+
+    def _get(self, key, now):
+        e = self._entries.get(key)
+        if e is not None and e[2] <= now:
+            del self._entries[key]
+            return None
+        return e
+
+    def _evict(self, now):
+        for key in [k for k, e in self._entries.items() if e[2] <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def locked(self, key: str) -> int:
+        now = _now()
+        with self._lock:
+            e = self._get(key, now)
+            return max(0, e[1] - now) if e else 0
+
+    def hit(self, key, max_attempts, lockout_seconds, window) -> int:
+        now = _now()
+        with self._lock:
+            e = self._get(key, now) or [0, 0, 0]
+            if e[1] > now:
+                return e[1] - now
+            e[:] = _apply_fail(e[0], e[1], e[2], now, max_attempts, lockout_seconds, window)
+            self._entries[key] = e
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._evict(now)
+            return max(0, e[1] - now)
+
+    def clear(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteLimiterStore:
+    def __init__(self, path: str, max_entries: int = 100000):
+        self.path = path
+        self.max_entries = max_entries
+        self._hits = 0
+        d = os.path.dirname(os.path.abspath(path))
+        os.makedirs(d, exist_ok=True)
+        with self._conn() as cx:
+            cx.execute("PRAGMA journal_mode=WAL")
+            cx.execute("""CREATE TABLE IF NOT EXISTS rate_limits (
+                key TEXT PRIMARY KEY, count INTEGER NOT NULL,
+                lock_until INTEGER NOT NULL, expires_at INTEGER NOT NULL)""")
+            cx.execute("CREATE INDEX IF NOT EXISTS ix_rate_limits_expires_at ON rate_limits (expires_at)")
+
+    def _conn(self):
+        # uma conexão por operação: seguro entre threads e processos
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def locked(self, key: str) -> int:
+        now = _now()
+        with self._conn() as cx:
+            row = cx.execute("SELECT lock_until FROM rate_limits WHERE key = ? AND expires_at > ?",
+                             (key, now)).fetchone()
+        return max(0, row[0] - now) if row else 0
+
+    def hit(self, key, max_attempts, lockout_seconds, window) -> int:
+        now = _now()
+        cx = self._conn()
+        try:
+            cx.execute("BEGIN IMMEDIATE")   # trava de escrita: leitura+escrita atômicas entre processos
+            row = cx.execute("SELECT count, lock_until, expires_at FROM rate_limits "
+                             "WHERE key = ? AND expires_at > ?", (key, now)).fetchone()
+            count, lock_until, expires_at = row if row else (0, 0, 0)
+            if lock_until > now:
+                cx.execute("COMMIT")
+                return lock_until - now
+            count, lock_until, expires_at = _apply_fail(count, lock_until, expires_at, now,
+                                                        max_attempts, lockout_seconds, window)
+            cx.execute("INSERT OR REPLACE INTO rate_limits (key, count, lock_until, expires_at) VALUES (?, ?, ?, ?)",
+                       (key, count, lock_until, expires_at))
+            self._hits += 1
+            if self._hits % PURGE_EVERY == 0:
+                self._purge(cx, now)
+            cx.execute("COMMIT")
+        except Exception:
+            cx.execute("ROLLBACK")
+            raise
+        finally:
+            cx.close()
+        return max(0, lock_until - now)
+
+    def _purge(self, cx, now):
+        cx.execute("DELETE FROM rate_limits WHERE expires_at <= ?", (now,))
+        excesso = cx.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0] - self.max_entries
+        if excesso > 0:
+            cx.execute("DELETE FROM rate_limits WHERE key IN "
+                       "(SELECT key FROM rate_limits ORDER BY expires_at LIMIT ?)", (excesso,))
+
+    def clear(self, key: str):
+        with self._conn() as cx:
+            cx.execute("DELETE FROM rate_limits WHERE key = ?", (key,))
+
+
+class DatabaseLimiterStore:
+    """Tabela rate_limits no banco da aplicação (SELECT ... FOR UPDATE por chave)."""
+
+    def __init__(self, max_entries: int = 100000):
+        self.max_entries = max_entries
+        self._hits = 0
+        self.table = RateLimitEntry.__table__
+
+    def locked(self, key: str) -> int:
+        now = _now()
+        t = self.table
+        with db.engine.connect() as cx:
+            lock_until = cx.execute(select(t.c.lock_until)
+                                    .where(t.c.key == key, t.c.expires_at > now)).scalar()
+        return max(0, lock_until - now) if lock_until else 0
+
+    def hit(self, key, max_attempts, lockout_seconds, window) -> int:
+        t = self.table
+        for _ in range(2):   # segunda volta só se outro worker inseriu a mesma chave ao mesmo tempo
+            now = _now()
+            try:
+                with db.engine.begin() as cx:
+                    row = cx.execute(select(t.c.count, t.c.lock_until, t.c.expires_at)
+                                     .where(t.c.key == key).with_for_update()).first()
+                    count, lock_until, expires_at = tuple(row) if row and row[2] > now else (0, 0, 0)
+                    if lock_until > now:
+                        return lock_until - now
+                    count, lock_until, expires_at = _apply_fail(count, lock_until, expires_at, now,
+                                                                max_attempts, lockout_seconds, window)
+                    valores = {"count": count, "lock_until": lock_until, "expires_at": expires_at}
+                    if row:
+                        cx.execute(t.update().where(t.c.key == key).values(**valores))
+                    else:
+                        cx.execute(t.insert().values(key=key, **valores))
+                    self._hits += 1
+                    if self._hits % PURGE_EVERY == 0:
+                        self._purge(cx, now)
+                return max(0, lock_until - now)
+            except IntegrityError:
+                continue
+        return 0
+
+    def _purge(self, cx, now):
+        t = self.table
+        cx.execute(delete(t).where(t.c.expires_at <= now))
+        excesso = cx.execute(select(func.count()).select_from(t)).scalar() - self.max_entries
+        if excesso > 0:
+            antigos = select(t.c.key).order_by(t.c.expires_at).limit(excesso).scalar_subquery()
+            cx.execute(delete(t).where(t.c.key.in_(antigos)))
+
+    def clear(self, key: str):
+        t = self.table
+        with db.engine.begin() as cx:
+            cx.execute(delete(t).where(t.c.key == key))
+
+
+def make_limiter_store(url: str, max_entries: int):
+    if url.startswith("sqlite:///"):
+        return SQLiteLimiterStore(url[len("sqlite:///"):], max_entries=max_entries)
+    if url == "database":
+        return DatabaseLimiterStore(max_entries=max_entries)
+    return MemoryLimiterStore(max_entries=max_entries)
+
+
+class AttemptLimiter:
+    """Extensão Flask: init_app(app) lê RATELIMIT_STORE e RATELIMIT_MAX_ENTRIES."""
+
+    def __init__(self, app=None):
+        self.store = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("RATELIMIT_STORE", "memory")
+        app.config.setdefault("RATELIMIT_MAX_ENTRIES", 10000)
+        self.store = make_limiter_store(app.config["RATELIMIT_STORE"],
+                                        int(app.config["RATELIMIT_MAX_ENTRIES"]))
+        app.extensions["attempt_limiter"] = self
+
+    def locked(self, key: str) -> int:
+        """Segundos restantes de bloqueio da chave (0 = liberada)."""
+        return self.store.locked(key)
+
+    def hit(self, key: str, max_attempts: int, lockout_seconds: int, window: int) -> int:
+        """
+        Conta uma tentativa. Ao atingir max_attempts a chave fica bloqueada por
+        lockout_seconds. A contagem vale por uma janela fixa de window segundos a partir
+        da primeira tentativa; vencida a janela, recomeça do zero.
+        Retorna os segundos de bloqueio resultantes (0 = ainda liberada).
+        """
+        return self.store.hit(key, max_attempts, lockout_seconds, window)
+
+    def clear(self, key: str):
+        self.store.clear(key)
+
+
+attempt_limiter = AttemptLimiter()
@@ -0,0 +1,119 @@
+# reindex.py — Reindexação dos documentos assinados (CLI do Flask)
+# ------------------------------------------------------------------------------------
+# Uso (a partir de Assinador/):
+#   flask --app app reindex                 # uma passada incremental
+#   flask --app app reindex --full          # re-hasheia tudo
+#   flask --app app reindex --watch -i 10   # fica observando novos arquivos
+#
+# Percorre a área "assinados" do armazenamento (storage.py: pasta particionada ou bucket)
+# e grava tamanho e mtime na tabela signatures (e CRC/SHA-256 de arquivos sem registro).
+# Só re-hasheia arquivos cujo (tamanho, mtime) mudou desde a última passada; no disco
+# local o hash roda em paralelo num pool de processos, via mmap; no S3, em threads lendo
+# cada objeto em blocos.
+#
+# O SHA-256 registrado na assinatura nunca é sobrescrito: é ele que a verificação usa.
+# Arquivo cujo conteúdo não bate com o registro mais recente conta em "divergentes" e é
+# avisado em toda passada (tamanho/mtime ficam como estavam, para continuar aparecendo).
+import re, time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import click
+from flask.cli import with_appcontext
+
+from models import db, Signature
+from hashing import sha256_of_file_mmap
+from storage import storage
+
+BATCH_COMMIT = 500
+_crc_re = re.compile(r"_([0-9a-f]{10})\.[^.]+$")
+
+
+def _hash_entry(args):
+    nome, path = args
+    return nome, sha256_of_file_mmap(path)
+
+
+def _hashes(backend, nomes, workers):
+    """(nome, sha256) de cada arquivo, em paralelo."""
+    if backend.is_local:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            tarefas = [(nome, backend.local_path(f"assinados/{nome}")) for nome in nomes]
+            yield from pool.map(_hash_entry, tarefas, chunksize=8)
+    else:
+        with ThreadPoolExecutor(max_workers=workers or 8) as pool:
+            yield from pool.map(lambda nome: (nome, backend.sha256(f"assinados/{nome}")), nomes)
+
+
+def reindex_once(backend=None, workers: int = None, full: bool = False, log=print) -> dict:
+    """
+    Uma passada incremental. Retorna contadores
+    (arquivos, hasheados, novos, atualizados, divergentes, ausentes, segundos).
+    """
+    t0 = time.perf_counter()
+    backend = backend or storage.backend
+    # nome -> (tamanho, mtime), só stat/listagem, sem leitura
+    arquivos = {nome: (tamanho, mtime) for nome, tamanho, mtime in backend.scan("assinados")}
+
+    # Estado atual do índice: arquivo -> (tamanho, mtime) do registro mais recente
+    # (ordenado por id: com várias linhas por arquivo, a última atribuição vence)
+    indexados = {}
+    for arquivo, tamanho, mtime in (db.session.query(Signature.arquivo, Signature.tamanho, Signature.mtime)
+                                    .order_by(Signature.id)):
+        indexados[arquivo] = (tamanho, mtime)
+
+    pendentes = [nome for nome, meta in arquivos.items() if full or indexados.get(nome) != meta]
+    stats = {"arquivos": len(arquivos), "hasheados": 0, "novos": 0, "atualizados": 0,
+             "divergentes": 0, "ausentes": len(set(indexados) - set(arquivos))}
+    if not pendentes:
+        stats["segundos"] = round(time.perf_counter() - t0, 3)
+        return stats
+
+    for i, (nome, sha) in enumerate(_hashes(backend, pendentes, workers), 1):
+        tamanho, mtime = arquivos[nome]
+        linhas = Signature.query.filter_by(arquivo=nome).order_by(Signature.id).all()
+        if linhas:
+            registrado = linhas[-1].sha256
+            if registrado and registrado != sha:
+                # versões anteriores têm outro SHA-256 por direito; a mais recente não
+                log(f"aviso: {nome} não confere com o SHA-256 registrado "
+                    f"({registrado[:12]}… registrado, {sha[:12]}… em disco)")
+                stats["divergentes"] += 1
+            else:
+                for sig in linhas:
+                    if not sig.sha256:
+                        sig.sha256 = sha
+                    if sig.sha256 == sha:
+                        sig.tamanho, sig.mtime = tamanho, mtime
+                stats["atualizados"] += 1
+        else:
+            # Documento assinado antes do registro: CRC vem do nome (assinado_<base>_<crc>.<ext>)
+            m = _crc_re.search(nome)
+            db.session.add(Signature(crc=m.group(1) if m else sha[:10], sha256=sha, arquivo=nome,
+                                     tamanho=tamanho, mtime=mtime))
+            stats["novos"] += 1
+        stats["hasheados"] += 1
+        if i % BATCH_COMMIT == 0:
+            db.session.commit()
+    db.session.commit()
+    stats["segundos"] = round(time.perf_counter() - t0, 3)
+    return stats
+
+
+@click.command("reindex")
+@click.option("--workers", "-w", type=int, default=None, help="Processos de hash (padrão: nº de CPUs).")
+@click.option("--full", is_flag=True, help="Re-hasheia todos os arquivos, mesmo sem mudança.")
+@click.option("--watch", is_flag=True, help="Repete a passada incremental até Ctrl+C.")
+@click.option("--interval", "-i", type=float, default=5.0, help="Segundos entre passadas no --watch.")
+@with_appcontext
+def reindex_command(workers, full, watch, interval):
+    """Indexa CRC/SHA-256/tamanho/mtime dos documentos assinados (STORAGE_BACKEND)."""
+    while True:
+        stats = reindex_once(workers=workers, full=full, log=click.echo)
+        if stats["hasheados"] or not watch:
+            click.echo(" ".join(f"{k}={v}" for k, v in stats.items()))
+        if not watch:
+            break
+        full = False
+        try:
+            time.sleep(interval)
+        except KeyboardInterrupt:
+            break
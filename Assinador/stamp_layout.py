@@ -0,0 +1,181 @@
+# stamp_layout.py — Layout do carimbo pré-compilado (PDF e imagem)
+# ------------------------------------------------------------------------------------
+# O layout (escala, quebra de linhas, medidas e centralização) só depende das linhas
+# do carimbo e do tamanho do retângulo: é calculado uma vez (lru_cache), com posições
+# relativas ao canto do retângulo, e depois apenas posicionado.
+#
+# No PDF o carimbo vira um Form XObject: é desenhado uma vez numa página auxiliar
+# (PdfStampTemplate) e colocado com show_pdf_page; páginas repetidas ("all") e
+# carimbos iguais reutilizam o mesmo XObject.
+import textwrap
+from functools import lru_cache
+from typing import NamedTuple
+import fitz  # PyMuPDF
+
+import assets
+
+# ===== Escala pelo tamanho do retângulo (base pensado para A4) =====
+BASE_W = 190.0   # largura útil de referência
+BASE_H = 180.0   # altura útil de referência
+
+QR_PX = (50, 50)   # QR e brasão no caminho de imagem (pixels)
+GAP_PX = 6
+
+
+class PdfLayout(NamedTuple):
+    qr: tuple       # (x0, y0, x1, y1) relativo ao canto do retângulo, em pontos
+    brasao: tuple
+    texts: tuple    # ((x, y_baseline, texto, fontsize), ...)
+    bbox: tuple     # área ocupada pelo carimbo (pode passar do retângulo)
+
+
+class ImageLayout(NamedTuple):
+    qr: tuple       # (x, y) relativo ao canto do retângulo, em pixels
+    brasao: tuple
+    texts: tuple    # ((x, y, texto, negrito), ...)
+
+
+@lru_cache(maxsize=4096)
+def _text_length(texto: str, fontsize: int) -> float:
+    return fitz.get_text_length(texto, fontname="helv", fontsize=fontsize)
+
+
+@lru_cache(maxsize=512)
+def compile_pdf_layout(linhas: tuple, status: str, ponto_w: int, ponto_h: int) -> PdfLayout:
+    s_w = ponto_w / BASE_W
+    s_h = ponto_h / BASE_H
+    s = max(0.6, min(4.0, min(s_w, s_h)))  # trava entre 60% e 400%
+
+    # tamanhos em pontos (PDF)
+    qr_w = int(round(35 * s))
+    qr_h = int(round(35 * s))
+    brasao_w = int(round(25 * s))
+    brasao_h = int(round(35 * s))
+    gap_pt = int(round(6 * s))
+
+    font_size_normal = max(6, int(round(9 * s)))
+    font_size_status = max(8, int(round(13 * s)))
+    espaco_entre_linhas = max(8, int(round(12 * s)))
+
+    # Centraliza ícones no topo do retângulo
+    total_icons_w = qr_w + gap_pt + brasao_w
+    x_icones = int((ponto_w - total_icons_w) / 2)
+    y_icones = int(round(10 * s))
+
+    qr = (x_icones, y_icones, x_icones + qr_w, y_icones + qr_h)
+    brasao = (x_icones + qr_w + gap_pt, y_icones,
+              x_icones + qr_w + gap_pt + brasao_w, y_icones + brasao_h)
+
+    # Texto (logo abaixo dos ícones)
+    texts = []
+    inicio_y_texto = y_icones + max(qr_h, brasao_h) + int(round(8 * s))
+
+    for linha in linhas:
+        if not linha.strip():
+            inicio_y_texto += int(round(5 * s))
+            continue
+
+        if status and linha.strip() == status.strip():
+            largura_status = _text_length(linha, font_size_status)
+            texts.append(((ponto_w - largura_status) / 2, inicio_y_texto, linha, font_size_status))
+            inicio_y_texto += font_size_status - int(round(4 * s))
+            continue
+
+        # wrap dinâmico baseado na largura disponível e no tamanho de fonte
+        chars_por_linha = max(20, int((ponto_w - 16) / (font_size_normal * 0.6)))
+        for sub in textwrap.wrap(linha, width=chars_por_linha):
+            largura_sub = _text_length(sub, font_size_normal)
+            texts.append(((ponto_w - largura_sub) / 2, inicio_y_texto, sub, font_size_normal))
+            inicio_y_texto += espaco_entre_linhas
+
+        if linha.startswith("Data/Hora:") or linha.startswith("Matrícula:"):
+            inicio_y_texto += int(round(6 * s))
+
+    # Área ocupada: ícones + texto (ascendente ~ fontsize, descendente ~ 0.3 * fontsize)
+    x0 = min([0, qr[0]] + [x for x, _, _, _ in texts])
+    x1 = max([ponto_w, brasao[2]] + [x + _text_length(t, fs) for x, _, t, fs in texts])
+    y1 = max([qr[3], brasao[3]] + [y + 0.3 * fs for _, y, _, fs in texts])
+    return PdfLayout(qr, brasao, tuple(texts), (x0, 0, x1, y1))
+
+
+class PdfStampTemplate:
+    """
+    PDF auxiliar com uma página por carimbo distinto (layout + brasão); cada página
+    é embutida no documento de destino como Form XObject reutilizável.
+    QR e brasões entram uma vez no auxiliar (mesmo xref para todas as páginas).
+    """
+
+    def __init__(self, qr_bytes: bytes):
+        self.doc = fitz.open()
+        self.qr_bytes = qr_bytes
+        self._pages = {}
+        self._xrefs = {}
+
+    def _insert_image(self, page, rect, key, data):
+        if key in self._xrefs:
+            page.insert_image(rect, xref=self._xrefs[key])
+        else:
+            self._xrefs[key] = page.insert_image(rect, stream=data)
+
+    def prepare(self, layout: PdfLayout, orgao: str) -> int:
+        """
+        Desenha (uma vez) a página auxiliar do carimbo. Todas as páginas devem ser
+        preparadas antes do primeiro place(): o graftmap do PyMuPDF não enxerga
+        objetos criados no auxiliar depois do primeiro enxerto.
+        """
+        emblem = assets.registry.emblem_key(orgao)
+        key = (layout, emblem)
+        if key not in self._pages:
+            x0, y0, x1, y1 = layout.bbox
+            page = self.doc.new_page(width=x1 - x0, height=y1 - y0)
+            off = (-x0, -y0, -x0, -y0)
+            self._insert_image(page, fitz.Rect(layout.qr) + off, "qr", self.qr_bytes)
+            self._insert_image(page, fitz.Rect(layout.brasao) + off,
+                               "brasao:" + emblem, assets.emblem_png(orgao))
+            for x, y, texto, fontsize in layout.texts:
+                page.insert_text((x - x0, y - y0), texto,
+                                 fontsize=fontsize, fontname="helv", color=(0, 0, 0))
+            self._pages[key] = page.number
+        return self._pages[key]
+
+    def place(self, page, layout: PdfLayout, orgao: str, ponto_x: int, ponto_y: int):
+        """Coloca o carimbo com o canto do retângulo em (ponto_x, ponto_y) da página."""
+        pno = self.prepare(layout, orgao)
+        x0, y0, x1, y1 = layout.bbox
+        page.show_pdf_page(fitz.Rect(ponto_x + x0, ponto_y + y0, ponto_x + x1, ponto_y + y1),
+                           self.doc, pno)
+
+    def close(self):
+        self.doc.close()
+
+
+@lru_cache(maxsize=512)
+def compile_image_layout(linhas: tuple, status: str, w_real: int) -> ImageLayout:
+    fonte, fonte_b = assets.pil_fonts()
+    brasao_size = assets.BRASAO_SIZE_PX
+
+    # Ícones pequenos lado a lado
+    total_icons_w = QR_PX[0] + GAP_PX + brasao_size[0]
+    x_icones = int((w_real - total_icons_w) / 2)
+    y_icones = 10
+
+    # Texto
+    texts = []
+    y_texto = y_icones + max(QR_PX[1], brasao_size[1]) + 8
+    for linha in linhas:
+        if not linha.strip():
+            y_texto += fonte.size + 6
+            continue
+        if status and linha.strip() == status.strip():
+            bbox = fonte_b.getbbox(linha)
+            largura_status = bbox[2] - bbox[0]
+            texts.append(((w_real - largura_status) // 2, y_texto, linha, True))
+            y_texto += (bbox[3] - bbox[1]) + 8
+            continue
+        for sub in textwrap.wrap(linha, width=40):
+            bbox = fonte.getbbox(sub)
+            largura_sub = bbox[2] - bbox[0]
+            texts.append(((w_real - largura_sub) // 2, y_texto, sub, False))
+            y_texto += (bbox[3] - bbox[1]) + 2
+
+    return ImageLayout((x_icones, y_icones), (x_icones + QR_PX[0] + GAP_PX, y_icones), tuple(texts))
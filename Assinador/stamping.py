@@ -0,0 +1,456 @@
+# stamping.py — Carimbo de assinatura (PyMuPDF + PIL), independente do Flask
+# ------------------------------------------------------------------------------------
+# Tudo aqui roda tanto na requisição (modo síncrono) quanto nos processos do pool
+# de assinatura (jobs.py). Por isso as funções recebem apenas dados simples
+# (dict/str/float) e não dependem de request/session.
+import os, io, time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import lru_cache
+import qrcode
+from qrcode.constants import ERROR_CORRECT_Q, ERROR_CORRECT_H
+from PIL import Image, ImageDraw, ImageOps, JpegImagePlugin, PngImagePlugin, TiffImagePlugin
+import fitz  # PyMuPDF
+
+import assets
+from stamp_layout import PdfStampTemplate, compile_pdf_layout, compile_image_layout
+from hashing import HashingWriter, copy_file_hashed, finish_appended_hash, sha256_of_file
+
+PDF_EXTS = ('.pdf',)
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.tif', '.tiff')
+SUPPORTED_EXTS = PDF_EXTS + IMAGE_EXTS
+
+# Saída do PDF: "full" regrava o arquivo inteiro; "incremental" anexa o carimbo
+# como atualização incremental aos bytes originais (que ficam intactos).
+OUTPUT_MODES = ("full", "incremental")
+
+# Perfis de gravação do PDF (kwargs de doc.save):
+#   fast    -> sem pós-processamento (mais rápido; brasão/QR ficam sem compressão)
+#   compact -> coleta de lixo + deflate de streams/imagens/fontes + object streams
+#   web     -> compactado e linearizado ("fast web view": 1ª página antes do download terminar)
+PDF_PROFILES = {
+    "fast": {},
+    "compact": dict(garbage=4, deflate=True, deflate_images=True, deflate_fonts=True, use_objstms=1),
+    "web": dict(garbage=3, deflate=True, deflate_images=True, deflate_fonts=True, linear=True),
+}
+# Na atualização incremental só valem opções que não regravam o original
+INCREMENTAL_SAFE = ("deflate", "deflate_images", "deflate_fonts")
+
+
+def make_qr_image(data: str, box_size: int = 6, border: int = 4, strong: bool = True):
+    """
+    Gera QR nítido (sem borrão), já no tamanho final 50x50.
+    """
+    qr = qrcode.QRCode(
+        version=None,
+        error_correction=ERROR_CORRECT_H if strong else ERROR_CORRECT_Q,
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white").convert("RGB")
+    return img.resize((50, 50), resample=Image.NEAREST)
+
+
+@lru_cache(maxsize=1024)
+def qr_png(data: str) -> bytes:
+    """
+    PNG do QR (50x50) em memória, cacheado pela URL de verificação:
+    reassinaturas e lotes no mesmo processo não recodificam o QR.
+    """
+    buf = io.BytesIO()
+    make_qr_image(data, box_size=6, border=4, strong=True).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+@contextmanager
+def _etapa(timings, nome):
+    """Soma o tempo do bloco em timings[nome] (segundos); timings=None não mede nada."""
+    if timings is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[nome] = timings.get(nome, 0.0) + time.perf_counter() - t0
+
+
+def warm_worker():
+    """Initializer do pool: decodifica brasões e fontes uma única vez por processo."""
+    assets.warm()
+
+
+# ---------- Conteúdo do carimbo ----------
+def agora_local() -> datetime:
+    try:
+        from zoneinfo import ZoneInfo
+        return datetime.now(ZoneInfo("America/Fortaleza"))
+    except Exception:
+        return datetime.now()
+
+
+def stamp_lines(nome, cpf_masked, matricula, orgao, status, processo, crc, agora=None):
+    _datahora = (agora or agora_local()).strftime('%d/%m/%Y %H:%M')
+    return [
+        "Assinado digitalmente por",
+        f"{nome}",
+        f"{cpf_masked}",
+        (f"Matrícula: {matricula}" if matricula else ""),  # mantém ordem mesmo se vazio
+        f"{orgao}",
+        (status or ""),
+        f"Processo: {processo}",
+        f"em: {_datahora}",
+        f"CRC: {crc}",
+    ]
+
+
+# ---------- PDF ----------
+def _pdf_pages(doc, page_num):
+    """Páginas (1-based) de um carimbo: "all" = todas; número fora do intervalo é ajustado."""
+    return _paginas(doc.page_count, page_num)
+
+
+def _paginas(total, page_num):
+    """Páginas (1-based) para total páginas (PDF ou TIFF multipágina)."""
+    if page_num == "all":
+        return range(1, total + 1)
+    # Garantir página válida
+    if page_num < 1:
+        page_num = 1
+    if page_num > total:
+        page_num = total
+    return [page_num]
+
+
+def _pdf_stamp_position(page, placement, linhas, status):
+    """Converte o retângulo do canvas para a página e devolve (ponto_x, ponto_y, layout)."""
+    x, y, w, h = placement["x"], placement["y"], placement["w"], placement["h"]
+    canvas_w, canvas_h = placement["canvas_w"], placement["canvas_h"]
+
+    pdf_w = page.rect.width
+    pdf_h = page.rect.height
+
+    # Salvaguarda: se canvas_w/h vierem 0 (por alguma razão), evita divisão por zero
+    if canvas_w <= 0: canvas_w = pdf_w
+    if canvas_h <= 0: canvas_h = pdf_h
+
+    # Escalas: do canvas (frontend) para a página real do PDF
+    escala_x = pdf_w / canvas_w
+    escala_y = pdf_h / canvas_h
+
+    ponto_x = int(x * escala_x)
+    ponto_y = int(y * escala_y)
+    ponto_w = max(1, int(w * escala_x))
+    ponto_h = max(1, int(h * escala_y))
+
+    #  Moldura debug
+    #page.draw_rect(fitz.Rect(ponto_x, ponto_y, ponto_x + ponto_w, ponto_y + ponto_h),
+    #              color=(1, 0, 0), width=1)
+
+    return ponto_x, ponto_y, compile_pdf_layout(tuple(linhas), status, ponto_w, ponto_h)
+
+
+def _draw_pdf_stamps(doc, stamps, qr_bytes):
+    # Um XObject por carimbo distinto; QR e brasões embutidos uma vez no documento
+    template = PdfStampTemplate(qr_bytes)
+    try:
+        posicoes = []
+        for st in stamps:
+            for page_num in _pdf_pages(doc, st["placement"]["page"]):
+                page = doc.load_page(page_num - 1)
+                ponto_x, ponto_y, layout = _pdf_stamp_position(page, st["placement"],
+                                                               st["linhas"], st.get("status"))
+                template.prepare(layout, st.get("orgao"))
+                posicoes.append((page, layout, st.get("orgao"), ponto_x, ponto_y))
+        # O auxiliar fica completo antes do primeiro show_pdf_page (graftmap)
+        for page, layout, orgao, ponto_x, ponto_y in posicoes:
+            template.place(page, layout, orgao, ponto_x, ponto_y)
+    finally:
+        template.close()
+
+
+def _stamp_pdf_incremental(src_path, dst_path, stamps, qr_bytes, timings=None, profile="fast"):
+    """
+    Copia o original para dst_path e anexa o carimbo como atualização incremental.
+    Retorna o SHA-256, ou None se o PDF não admite salvamento incremental
+    (ex.: arquivo que precisou de reparo, criptografado).
+    """
+    with _etapa(timings, "copy"):
+        h, tamanho_original = copy_file_hashed(src_path, dst_path)
+    with _etapa(timings, "open"):
+        doc = fitz.open(dst_path)
+    try:
+        if doc.is_encrypted or not doc.can_save_incrementally():
+            return None
+        with _etapa(timings, "draw"):
+            _draw_pdf_stamps(doc, stamps, qr_bytes)
+        opts = {k: v for k, v in PDF_PROFILES[profile].items() if k in INCREMENTAL_SAFE}
+        with _etapa(timings, "save"):
+            doc.save(dst_path, incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP, **opts)
+    finally:
+        doc.close()
+    # O prefixo já foi hasheado na cópia: lê só os bytes anexados
+    with _etapa(timings, "sha"):
+        return finish_appended_hash(h, dst_path, tamanho_original)
+
+
+def stamp_pdf(src_path, dst_path, stamps, qr_bytes, output_mode="full", timings=None, profile="fast"):
+    """
+    Aplica todos os carimbos (páginas/signatários) num único ciclo open/save
+    e grava em dst_path. Retorna o SHA-256 da saída.
+    profile: chave de PDF_PROFILES (no modo incremental, só a parte de deflate).
+    timings (dict, opcional) recebe os segundos de cada etapa: open, draw, save, sha.
+    """
+    if profile not in PDF_PROFILES:
+        raise ValueError(f"Perfil de PDF inválido: {profile!r} (use {', '.join(PDF_PROFILES)}).")
+    if output_mode == "incremental":
+        sha256_hex = _stamp_pdf_incremental(src_path, dst_path, stamps, qr_bytes, timings, profile)
+        if sha256_hex:
+            return sha256_hex
+        # sem suporte a incremental: cai para a regravação completa
+
+    with _etapa(timings, "open"):
+        doc = fitz.open(src_path)
+    with _etapa(timings, "draw"):
+        _draw_pdf_stamps(doc, stamps, qr_bytes)
+
+    # Salva (SHA-256 do arquivo final calculado enquanto é gravado)
+    with HashingWriter(dst_path) as saida:
+        with _etapa(timings, "save"):
+            doc.save(saida, **PDF_PROFILES[profile])
+        with _etapa(timings, "sha"):
+            sha256_hex = saida.hexdigest()
+    doc.close()
+    return sha256_hex
+
+
+# ---------- Imagem ----------
+# Só a região sob cada carimbo é convertida para RGB(A), desenhada e colada de volta
+# no modo de cor original: nada de convert('RGB') da imagem inteira (que dobrava o
+# pico de memória em digitalizações grandes). Cada página é decodificada uma vez;
+# TIFF multipágina é lido e gravado página a página. A saída mantém formato,
+# tabelas de quantização do JPEG (sem perda extra de qualidade), EXIF/ICC/DPI,
+# textos do PNG e compressão/tags descritivas do TIFF.
+NATIVE_MODES = ("RGB", "RGBA", "L", "LA", "CMYK", "1")   # carimbados sem converter a página
+TIFF_KEEP_TAGS = (270, 271, 272, 305, 306, 315, 33432)     # descrição, fabricante, modelo, software, data, autor, copyright
+
+
+def _image_stamp_geometry(size, placement, linhas, status):
+    """Retângulo do carimbo em pixels da imagem + layout compilado."""
+    x, y, w, h = placement["x"], placement["y"], placement["w"], placement["h"]
+    canvas_w, canvas_h = placement["canvas_w"], placement["canvas_h"]
+    largura_real, altura_real = size
+
+    # Salvaguarda: se canvas_w/h vierem 0
+    if canvas_w <= 0: canvas_w = largura_real
+    if canvas_h <= 0: canvas_h = altura_real
+
+    # Escalas: do canvas (frontend) para a imagem real
+    escala_x = largura_real / canvas_w
+    escala_y = altura_real / canvas_h
+
+    x_real = int(x * escala_x)
+    y_real = int(y * escala_y)
+    w_real = max(1, int(w * escala_x))
+    h_real = max(1, int(h * escala_y))
+    return (x_real, y_real, w_real, h_real), compile_image_layout(tuple(linhas), status, w_real)
+
+
+def _image_stamp_bbox(size, rect, layout, qr_rgba, brasao):
+    """Região da imagem tocada pelo carimbo (moldura, ícones e textos), recortada aos limites."""
+    x, y, w, h = rect
+    fonte, fonte_b = assets.pil_fonts()
+    caixas = [(x - 1, y - 1, x + w + 2, y + h + 2)]   # moldura com width=2
+    for (ix, iy), icone in ((layout.qr, qr_rgba), (layout.brasao, brasao)):
+        caixas.append((x + ix, y + iy, x + ix + icone.width, y + iy + icone.height))
+    for tx, ty, texto, negrito in layout.texts:
+        b = (fonte_b if negrito else fonte).getbbox(texto)
+        caixas.append((x + tx + b[0], y + ty + b[1], x + tx + b[2] + 1, y + ty + b[3] + 1))
+    x0 = max(0, min(c[0] for c in caixas))
+    y0 = max(0, min(c[1] for c in caixas))
+    x1 = min(size[0], max(c[2] for c in caixas))
+    y1 = min(size[1], max(c[3] for c in caixas))
+    return (x0, y0, x1, y1) if x1 > x0 and y1 > y0 else None
+
+
+def _draw_image_stamp(imagem, rect, layout, qr_rgba, brasao, origem=(0, 0)):
+    """Desenha o carimbo em imagem; origem = canto da imagem dentro da página (recorte)."""
+    x_real, y_real, w_real, h_real = rect
+    x_real -= origem[0]
+    y_real -= origem[1]
+
+    draw = ImageDraw.Draw(imagem)
+    fonte, fonte_b = assets.pil_fonts()
+
+    # Moldura (debug)
+    draw.rectangle([x_real, y_real, x_real + w_real, y_real + h_real], outline="red", width=2)
+
+    # Ícones pequenos lado a lado
+    qr_x, qr_y = layout.qr
+    br_x, br_y = layout.brasao
+    imagem.paste(qr_rgba, (x_real + qr_x, y_real + qr_y), qr_rgba)
+    imagem.paste(brasao, (x_real + br_x, y_real + br_y), brasao)
+
+    # Texto
+    for tx, ty, texto, negrito in layout.texts:
+        draw.text((x_real + tx, y_real + ty), texto, font=fonte_b if negrito else fonte, fill=(0, 0, 0))
+
+
+def _stamp_frame(frame, stamps, qr_rgba):
+    """
+    Carimba a página já decodificada, no lugar: recorta a região de cada carimbo,
+    desenha em RGB(A) e cola de volta no modo original. Retorna a página (outro
+    objeto só quando o modo de cor exige converter a página inteira, ex.: paleta).
+    """
+    if frame.mode not in NATIVE_MODES:
+        frame = frame.convert("RGBA" if "transparency" in frame.info or "A" in frame.mode else "RGB")
+    modo_recorte = "RGBA" if frame.mode in ("RGBA", "LA") else "RGB"
+    for st in stamps:
+        rect, layout = _image_stamp_geometry(frame.size, st["placement"], st["linhas"], st.get("status"))
+        brasao = assets.emblem_rgba(st.get("orgao"))
+        caixa = _image_stamp_bbox(frame.size, rect, layout, qr_rgba, brasao)
+        if caixa is None:
+            continue
+        recorte = frame.crop(caixa).convert(modo_recorte)
+        _draw_image_stamp(recorte, rect, layout, qr_rgba, brasao, origem=caixa[:2])
+        if frame.mode == "1":
+            recorte = recorte.convert("1", dither=Image.Dither.NONE)   # limiar, sem pontilhado
+        elif recorte.mode != frame.mode:
+            recorte = recorte.convert(frame.mode)
+        frame.paste(recorte, caixa[:2])
+    return frame
+
+
+def _save_options(original, fmt: str) -> dict:
+    """Parâmetros de gravação que preservam qualidade e metadados da imagem original."""
+    info = original.info
+    opts = {k: info[k] for k in ("icc_profile", "exif", "dpi") if info.get(k)}
+    if fmt == "JPEG" and original.format == "JPEG":
+        # mesmas tabelas/subamostragem: a re-compressão não degrada a qualidade
+        opts["qtables"] = original.quantization
+        sampling = JpegImagePlugin.get_sampling(original)
+        if sampling != -1:
+            opts["subsampling"] = sampling
+        if info.get("progressive") or info.get("progression"):
+            opts["progressive"] = True
+    elif fmt == "PNG":
+        if "transparency" in info:
+            opts["transparency"] = info["transparency"]
+        textos = getattr(original, "text", None) or {}
+        if textos:
+            pnginfo = PngImagePlugin.PngInfo()
+            for k, v in textos.items():
+                pnginfo.add_text(k, v)
+            opts["pnginfo"] = pnginfo
+    elif fmt == "TIFF":
+        if info.get("compression") and info["compression"] != "raw":
+            opts["compression"] = info["compression"]
+        tags = getattr(original, "tag_v2", None) or {}
+        tiffinfo = {t: tags[t] for t in TIFF_KEEP_TAGS if t in tags}
+        if tiffinfo:
+            opts["tiffinfo"] = tiffinfo
+    return opts
+
+
+def _image_pages(total, stamps):
+    """{índice da página (0-based): [carimbos]} — page "all" ou número (ajustado ao intervalo)."""
+    por_pagina = {}
+    for st in stamps:
+        for n in _paginas(total, st["placement"].get("page", 1)):
+            por_pagina.setdefault(n - 1, []).append(st)
+    return por_pagina
+
+
+def _orientada(imagem):
+    """Foto com EXIF de rotação: o navegador mostra girada, então carimbamos na imagem girada."""
+    if imagem.getexif().get(0x0112, 1) == 1:
+        return imagem
+    return ImageOps.exif_transpose(imagem)
+
+
+def _stamp_tiff_pages(imagem, dst_path, stamps, qr_rgba, timings):
+    """TIFF multipágina: uma página decodificada por vez, gravada em sequência."""
+    por_pagina = _image_pages(imagem.n_frames, stamps)
+    with open(dst_path, "w+b") as f, TiffImagePlugin.AppendingTiffWriter(f, new=True) as tf:
+        for i in range(imagem.n_frames):
+            with _etapa(timings, "open"):
+                imagem.seek(i)
+                imagem.load()
+            frame = imagem
+            if i in por_pagina:
+                with _etapa(timings, "draw"):
+                    frame = _stamp_frame(imagem, por_pagina[i], qr_rgba)
+            with _etapa(timings, "save"):
+                frame.save(tf, format="TIFF", **_save_options(imagem, "TIFF"))
+                tf.newFrame()
+    with _etapa(timings, "sha"):
+        return sha256_of_file(dst_path)
+
+
+def stamp_image(src_path, dst_path, stamps, qr_bytes, timings=None):
+    """
+    Aplica todos os carimbos na imagem e grava em dst_path, no formato da extensão
+    (o mesmo do upload). Retorna o SHA-256 da saída.
+    Memória: uma página decodificada no modo original + recortes do tamanho dos carimbos.
+    """
+    extensao = os.path.splitext(dst_path)[1].lower()
+    fmt = Image.registered_extensions()[extensao]
+    qr_rgba = Image.open(io.BytesIO(qr_bytes)).convert("RGBA")  # 50x50
+    with Image.open(src_path) as original:
+        if fmt == "TIFF" and getattr(original, "n_frames", 1) > 1:
+            return _stamp_tiff_pages(original, dst_path, stamps, qr_rgba, timings)
+
+        with _etapa(timings, "open"):
+            original.load()
+            imagem = _orientada(original)
+        opts = _save_options(original, fmt)
+        if imagem is not original:
+            opts.pop("exif", None)
+            if imagem.info.get("exif"):
+                opts["exif"] = imagem.info["exif"]   # sem a tag de rotação
+        with _etapa(timings, "draw"):
+            imagem = _stamp_frame(imagem, _image_pages(1, stamps).get(0, []), qr_rgba)
+        if fmt == "JPEG" and imagem.mode not in ("RGB", "L", "CMYK"):
+            imagem = imagem.convert("RGB")
+        if imagem.mode != original.mode:
+            # paleta com tRNS virou RGBA: a transparência agora está no canal alfa
+            opts.pop("transparency", None)
+
+        # SHA-256 do arquivo final calculado enquanto é gravado
+        with HashingWriter(dst_path) as saida:
+            with _etapa(timings, "save"):
+                imagem.save(saida, format=fmt, **opts)
+            with _etapa(timings, "sha"):
+                sha256_hex = saida.hexdigest()
+    return sha256_hex
+
+
+# ---------- Ponto de entrada (requisição ou pool) ----------
+def sign_document(spec: dict) -> dict:
+    """
+    Executa os carimbos descritos em spec (dict "picklável"):
+      upload_path, signed_path, crc, qr_url,
+      stamps=[{placement{page,x,y,w,h,canvas_w,canvas_h}, linhas, status, orgao}, ...],
+      output_mode (opcional, só PDF: "full" | "incremental"),
+      pdf_profile (opcional, só PDF: "fast" | "compact" | "web")
+    page pode ser "all" (todas as páginas).
+    Retorna {"sha256": ..., "timings": {etapa: segundos}} (qr, open, draw, save, sha).
+    """
+    extensao = os.path.splitext(spec["signed_path"])[1].lower()
+    if extensao not in SUPPORTED_EXTS:
+        raise ValueError("Formato não suportado. Envie PDF/JPG/PNG/TIFF.")
+
+    # QR pequeno 50x50 em memória (brasão do órgão vem do registro do processo)
+    timings = {}
+    with _etapa(timings, "qr"):
+        qr_bytes = qr_png(spec["qr_url"])
+    if extensao in PDF_EXTS:
+        sha256_hex = stamp_pdf(spec["upload_path"], spec["signed_path"], spec["stamps"], qr_bytes,
+                               output_mode=spec.get("output_mode", "full"), timings=timings,
+                               profile=spec.get("pdf_profile", "fast"))
+    else:
+        sha256_hex = stamp_image(spec["upload_path"], spec["signed_path"], spec["stamps"], qr_bytes,
+                                 timings=timings)
+    return {"sha256": sha256_hex, "timings": timings}
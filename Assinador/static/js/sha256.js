@@ -0,0 +1,128 @@
+// sha256.js — SHA-256 de um File/Blob no navegador, para verificar sem enviar o arquivo
+// ------------------------------------------------------------------------------------
+// window.sha256File(file, onProgress) -> Promise<hex>
+// Até SUBTLE_MAX bytes usa o WebCrypto (crypto.subtle.digest, nativo). O WebCrypto não
+// tem digest incremental, então arquivos maiores (pranchas, processos digitalizados) ou
+// páginas fora de contexto seguro (http://, sem crypto.subtle) usam a implementação
+// abaixo, lendo o arquivo em fatias de CHUNK bytes: a memória fica limitada a uma fatia.
+(function (global) {
+  'use strict';
+
+  var CHUNK = 4 * 1024 * 1024;
+  var SUBTLE_MAX = 64 * 1024 * 1024;
+
+  var K = new Uint32Array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2
+  ]);
+
+  function Sha256() {
+    this.h = new Uint32Array([0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a,
+                              0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19]);
+    this.w = new Uint32Array(64);
+    this.buf = new Uint8Array(64);   // bloco incompleto entre chamadas de update()
+    this.bufLen = 0;
+    this.bytes = 0;                  // Number: exato até 2^53 bytes
+  }
+
+  Sha256.prototype._blocks = function (data, off, end) {
+    var w = this.w, h = this.h;
+    var a, b, c, d, e, f, g, hh, i, t1, t2, x, y;
+    for (; off + 64 <= end; off += 64) {
+      for (i = 0; i < 16; i++) {
+        x = off + 4 * i;
+        w[i] = (data[x] << 24) | (data[x + 1] << 16) | (data[x + 2] << 8) | data[x + 3];
+      }
+      for (i = 16; i < 64; i++) {
+        x = w[i - 15]; y = w[i - 2];
+        w[i] = (((x >>> 7) | (x << 25)) ^ ((x >>> 18) | (x << 14)) ^ (x >>> 3)) +
+               (((y >>> 17) | (y << 15)) ^ ((y >>> 19) | (y << 13)) ^ (y >>> 10)) +
+               w[i - 7] + w[i - 16];
+      }
+      a = h[0]; b = h[1]; c = h[2]; d = h[3]; e = h[4]; f = h[5]; g = h[6]; hh = h[7];
+      for (i = 0; i < 64; i++) {
+        t1 = (hh + (((e >>> 6) | (e << 26)) ^ ((e >>> 11) | (e << 21)) ^ ((e >>> 25) | (e << 7))) +
+              ((e & f) ^ (~e & g)) + K[i] + w[i]) | 0;
+        t2 = ((((a >>> 2) | (a << 30)) ^ ((a >>> 13) | (a << 19)) ^ ((a >>> 22) | (a << 10))) +
+              ((a & b) ^ (a & c) ^ (b & c))) | 0;
+        hh = g; g = f; f = e; e = (d + t1) | 0; d = c; c = b; b = a; a = (t1 + t2) | 0;
+      }
+      h[0] += a; h[1] += b; h[2] += c; h[3] += d; h[4] += e; h[5] += f; h[6] += g; h[7] += hh;
+    }
+    return off;
+  };
+
+  Sha256.prototype.update = function (data) {   // data: Uint8Array
+    var off = 0, n;
+    this.bytes += data.length;
+    if (this.bufLen) {
+      n = Math.min(64 - this.bufLen, data.length);
+      this.buf.set(data.subarray(0, n), this.bufLen);
+      this.bufLen += n; off = n;
+      if (this.bufLen < 64) return this;
+      this._blocks(this.buf, 0, 64);
+      this.bufLen = 0;
+    }
+    off = this._blocks(data, off, data.length);
+    if (off < data.length) {
+      this.buf.set(data.subarray(off), 0);
+      this.bufLen = data.length - off;
+    }
+    return this;
+  };
+
+  Sha256.prototype.hex = function () {
+    // padding: 0x80, zeros e o tamanho em bits (64 bits, big-endian)
+    var pad = new Uint8Array(this.bufLen < 56 ? 64 : 128);
+    pad.set(this.buf.subarray(0, this.bufLen));
+    pad[this.bufLen] = 0x80;
+    var hi = Math.floor(this.bytes / 0x20000000), lo = (this.bytes % 0x20000000) * 8;
+    var p = pad.length - 8;
+    pad[p] = hi >>> 24; pad[p + 1] = hi >>> 16; pad[p + 2] = hi >>> 8; pad[p + 3] = hi;
+    pad[p + 4] = lo >>> 24; pad[p + 5] = lo >>> 16; pad[p + 6] = lo >>> 8; pad[p + 7] = lo;
+    this._blocks(pad, 0, pad.length);
+    var out = '';
+    for (var i = 0; i < 8; i++) out += ('00000000' + this.h[i].toString(16)).slice(-8);
+    return out;
+  };
+
+  function toHex(buffer) {
+    return Array.prototype.map.call(new Uint8Array(buffer), function (b) {
+      return ('0' + b.toString(16)).slice(-2);
+    }).join('');
+  }
+
+  function readSlice(blob, start, end) {
+    if (blob.slice(start, end).arrayBuffer) return blob.slice(start, end).arrayBuffer();
+    return new Promise(function (resolve, reject) {   // navegadores sem Blob.arrayBuffer()
+      var fr = new FileReader();
+      fr.onload = function () { resolve(fr.result); };
+      fr.onerror = function () { reject(fr.error); };
+      fr.readAsArrayBuffer(blob.slice(start, end));
+    });
+  }
+
+  async function sha256File(file, onProgress) {
+    var subtle = global.crypto && global.crypto.subtle;
+    if (subtle && file.size <= SUBTLE_MAX) {
+      var digest = await subtle.digest('SHA-256', await readSlice(file, 0, file.size));
+      if (onProgress) onProgress(1);
+      return toHex(digest);
+    }
+    var h = new Sha256();
+    for (var off = 0; off < file.size; off += CHUNK) {
+      h.update(new Uint8Array(await readSlice(file, off, Math.min(off + CHUNK, file.size))));
+      if (onProgress) onProgress(Math.min(off + CHUNK, file.size) / file.size);
+    }
+    return h.hex();
+  }
+
+  global.Sha256 = Sha256;
+  global.sha256File = sha256File;
+})(typeof window !== 'undefined' ? window : globalThis);
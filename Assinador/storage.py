@@ -0,0 +1,324 @@
+# storage.py — Armazenamento dos uploads e documentos assinados (disco local ou S3)
+# ------------------------------------------------------------------------------------
+# Chaves: "uploads/<sha256><ext>" (original enviado, endereçado pelo conteúdo: o mesmo
+# arquivo enviado de novo não é gravado outra vez; o nome dado pelo usuário fica em
+# Signature.nome_original) e "assinados/<nome>" (Signature.arquivo; nos novos, <uuid><ext>,
+# um por assinatura: o mesmo original assinado duas vezes gera dois arquivos).
+#
+# STORAGE_BACKEND:
+#   - "local": STORAGE_ROOT (padrão <app>/static/arquivos), particionado em
+#     STORAGE_SHARD_DEPTH níveis de 2 hex do SHA-1 do nome, para nenhuma pasta
+#     acumular centenas de milhares de arquivos:
+#         assinados/3f/5c0e9b7d1a2f4e6c8b3d0a9f7e1c2b4d.pdf
+#     Arquivos antigos, gravados sem partição (assinados/<nome>), continuam sendo lidos.
+#   - "s3": bucket STORAGE_S3_BUCKET (+ STORAGE_S3_PREFIX) em qualquer serviço
+#     compatível — STORAGE_S3_ENDPOINT aponta para MinIO/Ceph/etc. Requer boto3.
+#
+# PyMuPDF e PIL trabalham com caminhos: o carimbo sempre roda sobre arquivos locais.
+#   put_content(area, stream, ext)  grava o upload por conteúdo; devolve (sha256, chave,
+#                            caminho local para leitura)
+#   work_path(chave)         arquivo temporário único (".tmp-*", mesma extensão) onde gravar:
+#                            no local, na pasta do destino; no S3, em STORAGE_SCRATCH_DIR
+#   publish(chave, caminho)  leva o arquivo ao armazenamento (no local, os.replace atômico;
+#                            no S3, upload multipart) e remove o temporário
+#   discard(caminho)         remove o temporário de uma assinatura que falhou
+# Nenhum leitor vê arquivo pela metade, e duas gravações simultâneas da mesma chave não se
+# misturam: a última a publicar vence, inteira. Por isso os assinados têm chave única:
+# publish() nunca troca os bytes que uma linha de signatures já registrou.
+# Leitura e gravação são sempre em blocos (hashing.CHUNK_SIZE); nada é lido inteiro em memória.
+import os, hashlib, tempfile, uuid
+
+from hashing import CHUNK_SIZE, save_stream_hashed, sha256_of_file_mmap
+
+BACKENDS = ("local", "s3")
+TMP_PREFIX = ".tmp-"   # arquivos de trabalho: ignorados por scan() e removidos por discard()
+
+
+def normalize_key(key: str) -> str:
+    """Normaliza a chave ("area/nome"); ValueError se tentar sair do armazenamento."""
+    key = (key or "").replace("\\", "/").strip("/")
+    partes = key.split("/")
+    if len(partes) < 2 or any(p in ("", ".", "..") for p in partes):
+        raise ValueError(f"Chave de armazenamento inválida: {key!r}")
+    return key
+
+
+class LocalStorage:
+    is_local = True
+
+    def __init__(self, root: str, shard_depth: int = 1):
+        self.root = os.path.abspath(root)
+        self.shard_depth = max(0, shard_depth)
+
+    def area_dir(self, area: str) -> str:
+        return os.path.join(self.root, area)
+
+    def _shard(self, nome: str) -> list:
+        h = hashlib.sha1(nome.encode("utf-8")).hexdigest()
+        return [h[2 * i:2 * i + 2] for i in range(self.shard_depth)]
+
+    def path(self, key: str) -> str:
+        """Caminho particionado (onde os arquivos novos são gravados)."""
+        area, nome = normalize_key(key).split("/", 1)
+        return os.path.join(self.root, area, *self._shard(nome), *nome.split("/"))
+
+    def local_path(self, key: str):
+        """Caminho do arquivo existente (particionado ou legado, sem partição) ou None."""
+        for caminho in (self.path(key), os.path.join(self.root, *normalize_key(key).split("/"))):
+            if os.path.isfile(caminho):
+                return caminho
+        return None
+
+    def _temporario(self, pasta: str, ext: str = "") -> str:
+        os.makedirs(pasta, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=pasta, prefix=TMP_PREFIX, suffix=ext)
+        os.close(fd)
+        return tmp
+
+    def work_path(self, key: str) -> str:
+        # mesma pasta do destino: publish() é um rename atômico
+        caminho = self.path(key)
+        return self._temporario(os.path.dirname(caminho), os.path.splitext(caminho)[1])
+
+    def publish(self, key: str, src: str):
+        dst = self.path(key)
+        if os.path.abspath(src) != dst:
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            os.replace(src, dst)
+
+    def discard(self, src: str):
+        # só temporários: o caminho devolvido por put_content é o definitivo
+        if src and os.path.basename(src).startswith(TMP_PREFIX) and os.path.exists(src):
+            os.remove(src)
+
+    def put_content(self, area: str, stream, ext: str = ""):
+        tmp = self._temporario(self.area_dir(area), ext)
+        try:
+            sha = save_stream_hashed(stream, tmp)
+            key = f"{area}/{sha}{ext}"
+            dst = self.path(key)
+            if not os.path.isfile(dst):
+                # conteúdo novo; se outro upload idêntico publicar antes, o rename só o substitui
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                os.replace(tmp, dst)
+        finally:
+            self.discard(tmp)
+        return sha, key, dst
+
+    def save_stream(self, key: str, stream) -> str:
+        """Grava o stream em blocos (temporário + os.replace). Retorna o SHA-256."""
+        tmp = self.work_path(key)
+        try:
+            sha = save_stream_hashed(stream, tmp)
+            self.publish(key, tmp)
+        finally:
+            self.discard(tmp)
+        return sha
+
+    def open(self, key: str):
+        caminho = self.local_path(key)
+        if caminho is None:
+            raise FileNotFoundError(key)
+        return open(caminho, "rb")
+
+    def stat(self, key: str):
+        """(tamanho, mtime) ou None se não existir."""
+        caminho = self.local_path(key)
+        if caminho is None:
+            return None
+        st = os.stat(caminho)
+        return st.st_size, st.st_mtime
+
+    def sha256(self, key: str) -> str:
+        caminho = self.local_path(key)
+        if caminho is None:
+            raise FileNotFoundError(key)
+        return sha256_of_file_mmap(caminho)
+
+    def delete(self, key: str):
+        caminho = self.local_path(key)
+        if caminho:
+            os.remove(caminho)
+
+    def scan(self, area: str):
+        """(nome, tamanho, mtime) de cada arquivo da área — só stat, sem leitura."""
+        base = self.area_dir(area)
+        for raiz, _, arquivos in os.walk(base):
+            dirs = os.path.relpath(raiz, base).replace(os.sep, "/").split("/")
+            dirs = [] if dirs == ["."] else dirs
+            for nome in arquivos:
+                if nome.startswith(TMP_PREFIX):
+                    continue
+                # assinados/3f/<nome> -> <nome>; pastas que não são partição fazem parte do nome
+                rel = "/".join(dirs[self.shard_depth:] + [nome])
+                if dirs[:self.shard_depth] != self._shard(rel):
+                    rel = "/".join(dirs + [nome])
+                try:
+                    st = os.stat(os.path.join(raiz, nome))
+                except FileNotFoundError:
+                    continue
+                yield rel, st.st_size, st.st_mtime
+
+
+class _HashingReader:
+    """Embrulha o stream de leitura calculando o SHA-256 do que passa (upload_fileobj)."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.hash = hashlib.sha256()
+
+    def read(self, n=-1):
+        data = self._stream.read(n if n and n > 0 else CHUNK_SIZE)
+        self.hash.update(data)
+        return data
+
+
+class S3Storage:
+    is_local = False
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str = None, region: str = None,
+                 access_key: str = None, secret_key: str = None, scratch_dir: str = None):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+        except ImportError:
+            raise ValueError("STORAGE_BACKEND=s3 requer o pacote boto3. Instale boto3 ou use o backend local.")
+        if not bucket:
+            raise ValueError("STORAGE_BACKEND=s3 requer STORAGE_S3_BUCKET.")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.scratch_dir = scratch_dir or os.path.join(tempfile.gettempdir(), "assinador")
+        # cliente é thread-safe; multipart em partes de CHUNK_SIZE*8 (memória limitada)
+        self.client = boto3.client("s3", endpoint_url=endpoint_url or None, region_name=region or None,
+                                   aws_access_key_id=access_key or None,
+                                   aws_secret_access_key=secret_key or None)
+        self.transfer = TransferConfig(multipart_chunksize=8 * CHUNK_SIZE, io_chunksize=CHUNK_SIZE)
+
+    def _key(self, key: str) -> str:
+        return self.prefix + normalize_key(key)
+
+    def _missing(self, e) -> bool:
+        return e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def local_path(self, key: str):
+        return None
+
+    def work_path(self, key: str) -> str:
+        os.makedirs(self.scratch_dir, exist_ok=True)
+        return os.path.join(self.scratch_dir, f"{TMP_PREFIX}{uuid.uuid4().hex}_{os.path.basename(normalize_key(key))}")
+
+    def publish(self, key: str, src: str):
+        try:
+            self.client.upload_file(src, self.bucket, self._key(key), Config=self.transfer)
+        finally:
+            self.discard(src)
+
+    def discard(self, src: str):
+        if src and os.path.exists(src):
+            os.remove(src)
+
+    def put_content(self, area: str, stream, ext: str = ""):
+        # o carimbo precisa do arquivo local: a cópia de trabalho fica até o discard()
+        tmp = self.work_path(f"{area}/upload{ext}")
+        try:
+            sha = save_stream_hashed(stream, tmp)
+            key = f"{area}/{sha}{ext}"
+            if self.stat(key) is None:
+                self.client.upload_file(tmp, self.bucket, self._key(key), Config=self.transfer)
+        except BaseException:
+            self.discard(tmp)
+            raise
+        return sha, key, tmp
+
+    def save_stream(self, key: str, stream) -> str:
+        leitor = _HashingReader(stream)
+        self.client.upload_fileobj(leitor, self.bucket, self._key(key), Config=self.transfer)
+        return leitor.hash.hexdigest()
+
+    def open(self, key: str):
+        """Corpo da resposta do GET (StreamingBody: read(n) em blocos, close())."""
+        from botocore.exceptions import ClientError
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"]
+        except ClientError as e:
+            if self._missing(e):
+                raise FileNotFoundError(key)
+            raise
+
+    def stat(self, key: str):
+        from botocore.exceptions import ClientError
+        try:
+            r = self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if self._missing(e):
+                return None
+            raise
+        return r["ContentLength"], r["LastModified"].timestamp()
+
+    def sha256(self, key: str) -> str:
+        h = hashlib.sha256()
+        body = self.open(key)
+        try:
+            for chunk in iter(lambda: body.read(CHUNK_SIZE), b""):
+                h.update(chunk)
+        finally:
+            body.close()
+        return h.hexdigest()
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def scan(self, area: str):
+        base = self.prefix + area.strip("/") + "/"
+        paginas = self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=base)
+        for pagina in paginas:
+            for obj in pagina.get("Contents", []):
+                yield obj["Key"][len(base):], obj["Size"], obj["LastModified"].timestamp()
+
+    def presigned_url(self, key: str, expires: int, content_disposition: str = None) -> str:
+        params = {"Bucket": self.bucket, "Key": self._key(key)}
+        if content_disposition:
+            params["ResponseContentDisposition"] = content_disposition
+        return self.client.generate_presigned_url("get_object", ExpiresIn=expires, Params=params)
+
+
+def make_storage(config: dict, root_path: str):
+    backend = (config.get("STORAGE_BACKEND") or "local").lower()
+    if backend == "local":
+        return LocalStorage(config.get("STORAGE_ROOT") or os.path.join(root_path, "static", "arquivos"),
+                            shard_depth=config.get("STORAGE_SHARD_DEPTH", 1))
+    if backend == "s3":
+        return S3Storage(config.get("STORAGE_S3_BUCKET"), prefix=config.get("STORAGE_S3_PREFIX", ""),
+                         endpoint_url=config.get("STORAGE_S3_ENDPOINT"),
+                         region=config.get("STORAGE_S3_REGION"),
+                         access_key=config.get("STORAGE_S3_ACCESS_KEY"),
+                         secret_key=config.get("STORAGE_S3_SECRET_KEY"),
+                         scratch_dir=config.get("STORAGE_SCRATCH_DIR"))
+    raise ValueError(f"STORAGE_BACKEND inválido: {backend!r} (use {' ou '.join(BACKENDS)}).")
+
+
+class Storage:
+    """Extensão Flask: init_app(app) lê STORAGE_BACKEND e afins; delega ao backend escolhido."""
+
+    def __init__(self, app=None):
+        self.backend = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("STORAGE_BACKEND", "local")
+        app.config.setdefault("STORAGE_ROOT", "")
+        app.config.setdefault("STORAGE_SHARD_DEPTH", 1)
+        self.backend = make_storage(app.config, app.root_path)
+        app.extensions["storage"] = self
+
+    def __getattr__(self, name):
+        # work_path/publish/open/stat/... vão direto ao backend
+        if name == "backend":
+            raise AttributeError(name)
+        if self.backend is None:
+            raise RuntimeError("Storage não inicializado (storage.init_app(app)).")
+        return getattr(self.backend, name)
+
+
+storage = Storage()
@@ -0,0 +1,65 @@
+# conftest.py — Fixtures dos testes de fumaça (SQLite e armazenamento em pasta temporária)
+# ------------------------------------------------------------------------------------
+# Uso (a partir de Assinador/):
+#   python -m pytest -q tests
+# Nada de Postgres nem de static/arquivos: cada teste recebe um app com banco SQLite,
+# STORAGE_ROOT e PREVIEW_DIR próprios em tmp_path.
+import os, sys
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+UPLOADS_DIR = os.path.join(BASE_DIR, "static", "arquivos", "uploads")
+
+from config import TestingConfig  # noqa: E402
+
+USUARIO = {"nome": "Fulano de Tal", "email": "fulano@exemplo.gov.br", "cpf": "12345678909"}
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    import app as appmod
+    from auth import register_user
+    from jobs import signing_queue
+
+    monkeypatch.chdir(BASE_DIR)   # stamping lê brasão/fontes de static/ relativo ao cwd
+
+    class Cfg(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(tmp_path / "teste.db")
+        STORAGE_BACKEND = "local"
+        STORAGE_ROOT = str(tmp_path / "arquivos")
+        PREVIEW_DIR = str(tmp_path / "previews")
+        SIGNING_JOB_STORE = "memory"
+        PASSWORD_HASH_SCHEME = "pbkdf2"
+
+    app = appmod.create_app(Cfg)
+    with app.app_context():
+        appmod.db.create_all()
+        register_user(USUARIO["nome"], USUARIO["email"], USUARIO["cpf"])
+    yield app
+    signing_queue.shutdown()
+    with app.app_context():
+        appmod.db.session.remove()
+        appmod.db.engine.dispose()
+
+
+def csrf(client) -> str:
+    with client.session_transaction() as s:
+        return s["csrf_token"]
+
+
+@pytest.fixture
+def client(app):
+    """Cliente já autenticado como USUARIO."""
+    c = app.test_client()
+    c.get("/login")
+    c.post("/login", data={"email": USUARIO["email"], "cpf": USUARIO["cpf"], "csrf_token": csrf(c)})
+    return c
+
+
+def assinar(client, caminho: str, nome: str = None, **campos):
+    data = {"csrf_token": csrf(client), "processo": "0001/2025", "status": "Aprovado", "page": "1",
+            "x": "40", "y": "40", "w": "120", "h": "120", "canvas_w": "600", "canvas_h": "848",
+            "arquivo": (open(caminho, "rb"), nome or os.path.basename(caminho))}
+    data.update(campos)
+    return client.post("/assinar", data=data, content_type="multipart/form-data")
@@ -0,0 +1,139 @@
+import hashlib, io, json, os, zipfile
+
+import pytest
+
+from conftest import UPLOADS_DIR, assinar, csrf
+from models import db, Signature
+from storage import storage
+
+PDF = os.path.join(UPLOADS_DIR, "grid-a4.pdf")
+
+
+def test_assinar_baixar_e_verificar(app, client):
+    r = assinar(client, PDF, nome="relatório final.pdf")
+    assert r.status_code == 200
+
+    with app.app_context():
+        sig = Signature.query.one()
+        original = hashlib.sha256(open(PDF, "rb").read()).hexdigest()
+        assert sig.original_sha256 == original
+        assert sig.nome_original == "relatório final.pdf"
+        # original guardado pelo conteúdo; nenhum temporário sobrando
+        assert storage.stat(f"uploads/{original}.pdf") is not None
+        assert not [n for n, _, _ in storage.scan("assinados") if n.startswith(".tmp-")]
+
+    d = client.get(f"/download/{sig.arquivo}")
+    assert d.status_code == 200 and hashlib.sha256(d.data).hexdigest() == sig.sha256
+    assert client.get(f"/download/{sig.arquivo}", headers={"If-None-Match": d.headers["ETag"]}).status_code == 304
+
+    publico = app.test_client()
+    assert f"/verificar/crc/{sig.crc}/documento" in publico.get(f"/verificar/crc?crc={sig.crc}").get_data(as_text=True)
+    assert publico.get(f"/verificar/crc/{sig.crc}/documento").data == d.data
+
+    publico.get("/verificar/upload")
+    token = csrf(publico)
+    por_hash = publico.post("/verificar/upload", data={"csrf_token": token, "sha256": sig.sha256})
+    assert "idêntico a um documento oficial" in por_hash.get_data(as_text=True)
+    por_arquivo = publico.post("/verificar/upload", content_type="multipart/form-data",
+                               data={"csrf_token": token, "arquivo": (io.BytesIO(d.data), "copia.pdf")})
+    assert "idêntico a um documento oficial" in por_arquivo.get_data(as_text=True)
+    alterado = publico.post("/verificar/upload", content_type="multipart/form-data",
+                            data={"csrf_token": token, "arquivo": (io.BytesIO(d.data + b"\n"), "copia.pdf")})
+    assert "não corresponde" in alterado.get_data(as_text=True)
+
+    api = publico.get(f"/verificar/api/sha256/{sig.sha256}").get_json()
+    assert api["status"] == "confere" and api["documento"]["crc"] == sig.crc
+
+    lote = publico.post("/verificar/api/lote", json={"itens": [sig.crc, {"crc": sig.crc, "sha256": "0" * 64}]})
+    assert [x["status"] for x in lote.get_json()["resultados"]] == ["encontrado", "diverge"]
+
+
+def _zip(*membros):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for nome in membros:
+            zf.write(PDF, nome)
+    buf.seek(0)
+    return buf
+
+
+def test_lote_posicoes_pelo_caminho_no_zip(app, client):
+    token = csrf(client)
+    # só b/doc.pdf recebe o campo inválido: a sobreposição vale pelo caminho, não pelo nome
+    posicoes = json.dumps({"b/doc.pdf": {"output_mode": "invalido"}})
+    r = client.post("/assinar/lote", content_type="multipart/form-data",
+                    data={"csrf_token": token, "posicoes": posicoes, "x": "40", "y": "40", "w": "120",
+                          "h": "120", "canvas_w": "600", "canvas_h": "848", "page": "1",
+                          "arquivos": (_zip("a/doc.pdf", "b/doc.pdf"), "lote.zip")})
+    por_chave = {it["arquivo_original"]: it for it in r.get_json()["resultados"]}
+    assert set(por_chave) == {"a/doc.pdf", "b/doc.pdf"}
+    assert "crc" in por_chave["a/doc.pdf"] and "erro" in por_chave["b/doc.pdf"]
+
+
+@pytest.mark.parametrize("posicoes", ["[1]", '"x"', '{"doc.pdf": [1]}', "{"])
+def test_lote_posicoes_invalidas(app, client, posicoes):
+    r = client.post("/assinar/lote", content_type="multipart/form-data",
+                    data={"csrf_token": csrf(client), "posicoes": posicoes,
+                          "arquivos": (open(PDF, "rb"), "doc.pdf")})
+    assert r.status_code == 400 and "Lote inválido" in r.get_json()["erro"]
+
+
+def test_assinar_duas_vezes_nao_sobrescreve(app, client):
+    assinar(client, PDF, processo="A/1")
+    assinar(client, PDF, processo="B/2")
+    with app.app_context():
+        a, b = Signature.query.order_by(Signature.id).all()
+    assert (a.processo, b.processo) == ("A/1", "B/2") and a.arquivo != b.arquivo
+    for sig in (a, b):
+        d = client.get(f"/download/{sig.arquivo}")
+        assert hashlib.sha256(d.data).hexdigest() == sig.sha256
+        assert f"assinado_grid-a4_{sig.crc}.pdf" in d.headers["Content-Disposition"]
+
+
+def test_cada_assinatura_tem_crc_e_copia_oficial_proprios(app, client):
+    assinar(client, PDF, processo="A/1")
+    assinar(client, PDF, processo="B/2")
+    with app.app_context():
+        a, b = Signature.query.order_by(Signature.id).all()
+    assert a.crc != b.crc and a.original_sha256 == b.original_sha256
+
+    publico = app.test_client()
+    for sig in (a, b):
+        doc = publico.get(f"/verificar/api/sha256/{sig.sha256}").get_json()["documento"]
+        assert doc["crc"] == sig.crc
+        copia = publico.get(doc["documento_url"])
+        assert hashlib.sha256(copia.data).hexdigest() == sig.sha256
+        assert hashlib.sha256(publico.get(f"/verificar/crc/{sig.crc}/documento").data).hexdigest() == sig.sha256
+
+
+def test_registro_antigo_sobrescrito_nao_serve_outra_copia(app):
+    # linhas de antes da chave única: o mesmo arquivo regravado por uma segunda assinatura
+    with app.app_context():
+        storage.save_stream("assinados/assinado_x_0123456789.pdf", io.BytesIO(b"%PDF B"))
+        for sha in (hashlib.sha256(b"%PDF A").hexdigest(), hashlib.sha256(b"%PDF B").hexdigest()):
+            db.session.add(Signature(crc="0123456789", sha256=sha, arquivo="assinado_x_0123456789.pdf"))
+        db.session.commit()
+    publico = app.test_client()
+    antigo = f"/verificar/crc/0123456789/documento?sha256={hashlib.sha256(b'%PDF A').hexdigest()}"
+    assert publico.get(antigo).status_code == 404
+    assert publico.get("/verificar/crc/0123456789/documento").data == b"%PDF B"
+
+
+def test_lote_membros_iguais_em_pastas_diferentes(app, client):
+    r = client.post("/assinar/lote", content_type="multipart/form-data",
+                    data={"csrf_token": csrf(client), "x": "40", "y": "40", "w": "120", "h": "120",
+                          "canvas_w": "600", "canvas_h": "848", "page": "1",
+                          "arquivos": (_zip("a/doc.pdf", "b/doc.pdf"), "lote.zip")})
+    a, b = r.get_json()["resultados"]
+    assert "erro" not in a and "erro" not in b
+    assert a["arquivo"] != b["arquivo"] and a["crc"] != b["crc"]
+    for item in (a, b):
+        assert hashlib.sha256(client.get(item["download_url"]).data).hexdigest() == item["sha256"]
+
+
+def test_lote_limita_tamanho_descompactado(app, client):
+    app.config["BATCH_MAX_BYTES"] = os.path.getsize(PDF) + 1
+    r = client.post("/assinar/lote", content_type="multipart/form-data",
+                    data={"csrf_token": csrf(client),
+                          "arquivos": (_zip("a/doc.pdf", "b/doc.pdf"), "lote.zip")})
+    assert r.status_code == 400 and "descompactados" in r.get_json()["erro"]
@@ -0,0 +1,15 @@
+import json, os, subprocess, sys
+
+from conftest import BASE_DIR
+
+
+def test_bench_signing_roda_um_caso(tmp_path):
+    saida = tmp_path / "bench.json"
+    r = subprocess.run([sys.executable, os.path.join(BASE_DIR, "benchmarks", "bench_signing.py"),
+                        "--no-images", "--repeat", "1", "--warmup", "0", "--boxes", "120",
+                        "--out", str(saida), "grid-a4.pdf"],
+                       cwd=BASE_DIR, capture_output=True, text=True, timeout=300)
+    assert r.returncode == 0, r.stderr
+    (resultado,) = json.loads(saida.read_text(encoding="utf-8"))["results"]
+    assert resultado["file"] == "grid-a4.pdf" and resultado["out_bytes"] > 0
+    assert set(resultado["stages"]) == {"upload", "carimbo", "registro", "total"}
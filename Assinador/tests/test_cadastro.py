@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+
+from app import _usuarios_pagina
+from models import db, User
+
+BASE = datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _criar(app):
+    # dois pares com o mesmo created_at: o id desempata
+    with app.app_context():
+        for i, minutos in enumerate((0, 0, 1, 2, 2)):
+            db.session.add(User(nome=f"Servidor {i}", email=f"s{i}@exemplo.gov.br", cpf_hash="x",
+                                cpf_masked="***", created_at=BASE + timedelta(minutes=minutos)))
+        db.session.commit()
+
+
+def _todas(cursor="", limit=2):
+    nomes = []
+    while True:
+        usuarios, cursor = _usuarios_pagina("servidor", cursor, limit)
+        nomes += [u.nome for u in usuarios]
+        if not cursor:
+            return nomes
+
+
+def test_paginas_cobrem_todos_sem_repetir(app):
+    _criar(app)
+    with app.app_context():
+        assert _todas() == ["Servidor 4", "Servidor 3", "Servidor 2", "Servidor 1", "Servidor 0"]
+
+
+def test_cursor_de_usuario_excluido_continua(app):
+    _criar(app)
+    with app.app_context():
+        pagina, cursor = _usuarios_pagina("servidor", "", 2)
+        assert [u.nome for u in pagina] == ["Servidor 4", "Servidor 3"]
+        db.session.delete(pagina[-1])
+        db.session.commit()
+        resto = _todas(cursor)
+        assert resto == ["Servidor 2", "Servidor 1", "Servidor 0"]
@@ -0,0 +1,63 @@
+import hashlib, os
+
+import pytest
+
+from conftest import UPLOADS_DIR, assinar
+from models import Signature
+
+PDF = os.path.join(UPLOADS_DIR, "grid-a4.pdf")
+
+
+@pytest.fixture
+def assinado(app, client):
+    assinar(client, PDF, nome="relatório.pdf")
+    with app.app_context():
+        sig = Signature.query.one()
+        return sig.arquivo, sig.sha256, sig.crc
+
+
+def test_etag_e_condicionais(client, assinado):
+    arquivo, sha, crc = assinado
+    r = client.get(f"/download/{arquivo}")
+    assert r.status_code == 200 and hashlib.sha256(r.data).hexdigest() == sha
+    assert r.headers["ETag"] == f'"{sha}"' and r.headers["Accept-Ranges"] == "bytes"
+    assert "private" in r.headers["Cache-Control"]
+    # nome acentuado: filename ASCII + filename* UTF-8
+    disp = r.headers["Content-Disposition"]
+    assert disp.startswith("attachment") and f"filename*=UTF-8''assinado_relat%C3%B3rio_{crc}.pdf" in disp
+    assert client.get(f"/download/{arquivo}?inline=1").headers["Content-Disposition"].startswith("inline")
+
+    assert client.get(f"/download/{arquivo}", headers={"If-None-Match": f'"{sha}"'}).status_code == 304
+    assert client.get(f"/download/{arquivo}", headers={"If-None-Match": '"outro"'}).status_code == 200
+    assert client.get(f"/download/{arquivo}",
+                      headers={"If-Modified-Since": r.headers["Last-Modified"]}).status_code == 304
+
+
+def test_range(client, assinado):
+    arquivo, sha, _ = assinado
+    inteiro = client.get(f"/download/{arquivo}").data
+    r = client.get(f"/download/{arquivo}", headers={"Range": "bytes=10-109"})
+    assert r.status_code == 206 and r.data == inteiro[10:110]
+    assert r.headers["Content-Range"] == f"bytes 10-109/{len(inteiro)}"
+    # If-Range com ETag antigo: arquivo inteiro
+    r = client.get(f"/download/{arquivo}", headers={"Range": "bytes=0-9", "If-Range": '"outro"'})
+    assert r.status_code == 200 and len(r.data) == len(inteiro)
+    assert client.get(f"/download/{arquivo}", headers={"Range": f"bytes={len(inteiro) + 10}-"}).status_code == 416
+
+
+def test_x_accel_redirect(app, client, assinado):
+    arquivo, sha, _ = assinado
+    app.config["SIGNED_FILES_DELIVERY"] = "x-accel"
+    r = client.get(f"/download/{arquivo}")
+    assert r.status_code == 200 and r.data == b""
+    assert r.headers["X-Accel-Redirect"].startswith("/_assinados/")
+    assert r.headers["X-Accel-Redirect"].endswith(arquivo) and "X-Sendfile" not in r.headers
+    r = client.get(f"/download/{arquivo}", headers={"If-None-Match": f'"{sha}"'})
+    assert r.status_code == 304 and "X-Accel-Redirect" not in r.headers
+
+
+def test_download_exige_login_e_nao_sai_da_area(app, client, assinado):
+    arquivo, _, _ = assinado
+    assert app.test_client().get(f"/download/{arquivo}").status_code in (302, 401)
+    assert client.get("/download/../uploads/x.pdf").status_code == 404
+    assert client.get("/download/nao-existe.pdf").status_code == 404
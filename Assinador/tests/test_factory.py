@@ -0,0 +1,13 @@
+import os, subprocess, sys
+
+from conftest import BASE_DIR
+
+
+def test_create_app_nao_importa_fitz():
+    # a rota de assinatura importa o PyMuPDF só quando é usada
+    codigo = ("import sys; from app import create_app; from config import TestingConfig; "
+              "create_app(TestingConfig); print('fitz' in sys.modules)")
+    r = subprocess.run([sys.executable, "-c", codigo], cwd=BASE_DIR, env={**os.environ, "TEST_DATABASE_URL": "sqlite://"},
+                       capture_output=True, text=True, timeout=120)
+    assert r.returncode == 0, r.stderr
+    assert r.stdout.strip().splitlines()[-1] == "False"
@@ -0,0 +1,64 @@
+import hashlib, os, time
+
+import jobs
+import stamping
+from conftest import UPLOADS_DIR, csrf
+from jobs import signing_queue
+
+PDF = os.path.join(UPLOADS_DIR, "grid-a4.pdf")
+
+
+def _esperar(job_id, status=("done", "error"), timeout=60):
+    fim = time.time() + timeout
+    while time.time() < fim:
+        job = signing_queue.get(job_id)
+        if job["status"] in status:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} ainda em {job['status']}")
+
+
+def _morre(spec):
+    os._exit(1)   # simula worker morto pelo OOM killer
+
+
+def _ok(spec):
+    return {"sha256": "0" * 64, "timings": {}}
+
+
+def test_assinar_async_ate_o_download(app, client):
+    r = client.post("/assinar/async", content_type="multipart/form-data",
+                    data={"csrf_token": csrf(client), "x": "40", "y": "40", "w": "120", "h": "120",
+                          "canvas_w": "600", "canvas_h": "848", "page": "1",
+                          "arquivo": (open(PDF, "rb"), "grid-a4.pdf")})
+    assert r.status_code == 202
+    _esperar(r.get_json()["job_id"])
+    job = client.get(r.get_json()["status_url"]).get_json()
+    assert job["status"] == "done", job
+    baixado = client.get(job["result"]["download_url"]).data
+    assert hashlib.sha256(baixado).hexdigest() == job["result"]["sha256"]
+
+
+def test_pool_quebrado_e_recriado(app, monkeypatch):
+    app.config.update(SIGNING_EXECUTOR="process", SIGNING_WORKERS=1)
+    signing_queue.shutdown()
+    monkeypatch.setattr(stamping, "sign_document", _morre)
+    with app.app_context():
+        morto = signing_queue.submit({}, owner="x")
+    job = _esperar(morto)
+    assert job["status"] == "error"
+
+    monkeypatch.setattr(stamping, "sign_document", _ok)
+    with app.app_context():
+        depois = signing_queue.submit({}, owner="x")
+    job = _esperar(depois)
+    assert job["status"] == "done" and job["result"]["sha256"] == "0" * 64
+
+
+def test_job_parado_na_fila_vira_erro(app, monkeypatch):
+    signing_queue.store.create("parado", "x")
+    assert signing_queue.get("parado")["status"] == "queued"
+    agora = time.time()
+    monkeypatch.setattr(jobs, "_now", lambda: agora + app.config["SIGNING_JOB_MAX_AGE"] + 1)
+    job = signing_queue.get("parado")
+    assert job["status"] == "error" and job["error"] == jobs.STALE_ERROR
@@ -0,0 +1,43 @@
+from conftest import USUARIO, csrf
+from models import User
+from passwords import password_hashing
+
+ERRADO = "52998224725"   # CPF válido, mas de outra pessoa
+
+
+def _login(app, cpf=USUARIO["cpf"], cliente=None):
+    c = cliente or app.test_client()
+    c.get("/login")
+    c.post("/login", data={"email": USUARIO["email"], "cpf": cpf, "csrf_token": csrf(c)})
+    with c.session_transaction() as s:
+        return c, s.get("user")
+
+
+def _hash_gravado(app):
+    with app.app_context():
+        return User.query.filter_by(email=USUARIO["email"]).one().cpf_hash
+
+
+def test_rehash_para_o_esquema_configurado(app):
+    assert _hash_gravado(app).startswith("pbkdf2:")
+    app.config.update(PASSWORD_HASH_SCHEME="argon2", ARGON2_TIME_COST=1, ARGON2_MEMORY_COST=1024)
+    password_hashing.init_app(app)
+
+    assert _login(app)[1]["email"] == USUARIO["email"]
+    novo = _hash_gravado(app)
+    assert novo.startswith("$argon2id$") and "m=1024,t=1" in novo
+    assert _login(app)[1] is not None and _hash_gravado(app) == novo   # sem regravar de novo
+    assert _login(app, ERRADO)[1] is None
+
+
+def test_fila_de_hash_cheia(app):
+    vagas = password_hashing.workers + app.config["PASSWORD_HASH_QUEUE"]
+    for _ in range(vagas):
+        password_hashing._slots.acquire()
+    try:
+        c, usuario = _login(app)
+        assert usuario is None and "Muitos acessos" in c.get("/login").get_data(as_text=True)
+    finally:
+        for _ in range(vagas):
+            password_hashing._slots.release()
+    assert _login(app)[1] is not None
@@ -0,0 +1,17 @@
+REMOTO = {"REMOTE_ADDR": "203.0.113.5"}
+
+
+def test_metrics_sem_token_so_local(app):
+    cliente = app.test_client()
+    assert cliente.get("/metrics").status_code == 200
+    assert cliente.get("/metrics", environ_base=REMOTO).status_code == 403
+    app.config["METRICS_PUBLIC"] = True
+    assert cliente.get("/metrics", environ_base=REMOTO).status_code == 200
+
+
+def test_metrics_com_token(app):
+    app.config["METRICS_TOKEN"] = "segredo"
+    cliente = app.test_client()
+    assert cliente.get("/metrics").status_code == 401
+    r = cliente.get("/metrics", environ_base=REMOTO, headers={"Authorization": "Bearer segredo"})
+    assert r.status_code == 200 and "assinador_operations_total" in r.get_data(as_text=True)
@@ -0,0 +1,57 @@
+import hashlib, json, os
+
+import fitz
+
+from conftest import UPLOADS_DIR, USUARIO, assinar, csrf
+from auth import register_user
+from models import db, User, Signature
+
+PDF = os.path.join(UPLOADS_DIR, "encaminhamento.pdf")   # 2 páginas
+OUTRO = {"nome": "Beltrana Souza", "email": "beltrana@exemplo.gov.br", "cpf": "52998224725"}
+
+
+def _placement(page, x, signatario=None):
+    p = {"page": page, "x": x, "y": 40, "w": 120, "h": 120, "canvas_w": 600, "canvas_h": 848}
+    if signatario:
+        p["signatario"] = signatario
+    return p
+
+
+def _login(app, dados):
+    c = app.test_client()
+    c.get("/login")
+    c.post("/login", data={"email": dados["email"], "cpf": dados["cpf"], "csrf_token": csrf(c)})
+    return c
+
+
+def test_varios_signatarios_num_so_arquivo(app):
+    with app.app_context():
+        register_user(OUTRO["nome"], OUTRO["email"], OUTRO["cpf"])
+        User.query.filter_by(email=USUARIO["email"]).one().is_admin = True
+        db.session.commit()
+    admin = _login(app, USUARIO)
+
+    placements = [_placement(1, 40), _placement("all", 300, OUTRO["email"])]
+    assinar(admin, PDF, placements=json.dumps(placements))
+    with app.app_context():
+        linhas = Signature.query.order_by(Signature.id).all()
+    assert [s.signatario_email for s in linhas] == [USUARIO["email"], OUTRO["email"]]
+    assert len({(s.arquivo, s.sha256, s.crc) for s in linhas}) == 1
+
+    dados = admin.get(f"/download/{linhas[0].arquivo}").data
+    assert hashlib.sha256(dados).hexdigest() == linhas[0].sha256
+    doc = fitz.open(stream=dados, filetype="pdf")
+    textos = [doc[n].get_text() for n in range(doc.page_count)]
+    assert USUARIO["nome"] in textos[0] and OUTRO["nome"] in textos[0]
+    assert OUTRO["nome"] in textos[1] and USUARIO["nome"] not in textos[1]
+
+
+def test_outro_signatario_exige_admin(app, client):
+    with app.app_context():
+        register_user(OUTRO["nome"], OUTRO["email"], OUTRO["cpf"])
+    placements = [_placement(1, 40, OUTRO["email"])]
+    r = assinar(client, PDF, placements=json.dumps(placements))
+    assert "Somente administradores" in r.get_data(as_text=True)
+    assert "placements inválido" in assinar(client, PDF, placements="[").get_data(as_text=True)
+    with app.app_context():
+        assert Signature.query.count() == 0
@@ -0,0 +1,50 @@
+import io, os
+
+from PIL import Image
+
+from conftest import UPLOADS_DIR, csrf
+from previews import limpar_previews
+
+PDF = os.path.join(UPLOADS_DIR, "grid-a4.pdf")
+
+
+def _enviar(client, dados, nome):
+    return client.post("/assinar/preview", content_type="multipart/form-data",
+                       data={"csrf_token": csrf(client), "arquivo": (io.BytesIO(dados), nome)})
+
+
+def test_metadados_e_pagina_png(app, client):
+    meta = _enviar(client, open(PDF, "rb").read(), "grid-a4.pdf").get_json()
+    assert meta["page_count"] == 1 and meta["pages"][0]["w"] > 0
+    assert client.get(f"/assinar/preview/{meta['sha256']}").get_json()["page_count"] == 1
+
+    r = client.get(f"/assinar/preview/{meta['sha256']}/1.png?dpi=50")
+    assert r.status_code == 200 and r.mimetype == "image/png"
+    assert "private" in r.headers["Cache-Control"] and "immutable" in r.headers["Cache-Control"]
+    largura = Image.open(io.BytesIO(r.data)).width
+    assert abs(largura - meta["pages"][0]["w"] / 72 * 48) <= 1   # 50 dpi arredondado ao passo de 12
+
+    # DPI parecido cai na mesma imagem do cache (mesmo ETag -> 304)
+    r2 = client.get(f"/assinar/preview/{meta['sha256']}/1.png?dpi=52",
+                    headers={"If-None-Match": r.headers["ETag"]})
+    assert r2.status_code == 304
+    assert client.get(f"/assinar/preview/{meta['sha256']}/2.png").status_code == 404
+
+
+def test_tiff_multipagina(app, client):
+    buf = io.BytesIO()
+    paginas = [Image.new("L", (300, 400), 255), Image.new("L", (400, 300), 0)]
+    paginas[0].save(buf, format="TIFF", save_all=True, append_images=paginas[1:])
+    meta = _enviar(client, buf.getvalue(), "scan.tif").get_json()
+    assert meta["page_count"] == 2 and meta["pages"][0]["w"] < meta["pages"][1]["w"]
+    assert client.get(f"/assinar/preview/{meta['sha256']}/2.png").status_code == 200
+
+
+def test_invalidos_e_limpeza(app, client):
+    assert _enviar(client, b"nao sou pdf", "x.pdf").status_code == 400
+    assert client.get("/assinar/preview/" + "0" * 64).status_code == 404
+    assert client.get("/assinar/preview/nao-e-sha/1.png").status_code == 404
+
+    _enviar(client, open(PDF, "rb").read(), "grid-a4.pdf")
+    assert limpar_previews(-1, app.config["PREVIEW_DIR"]) >= 2   # original + json
+    assert not any(files for _, _, files in os.walk(app.config["PREVIEW_DIR"]))
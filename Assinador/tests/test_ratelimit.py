@@ -0,0 +1,67 @@
+import pytest
+
+import ratelimit
+from conftest import USUARIO, csrf
+from ratelimit import MemoryLimiterStore, SQLiteLimiterStore, DatabaseLimiterStore
+
+
+@pytest.fixture(params=["memory", "sqlite", "database"])
+def store(request, app, tmp_path):
+    if request.param == "memory":
+        yield MemoryLimiterStore()
+    elif request.param == "sqlite":
+        yield SQLiteLimiterStore(str(tmp_path / "limites.db"))
+    else:
+        with app.app_context():
+            yield DatabaseLimiterStore()
+
+
+def test_janela_fixa_recomeca_a_contagem(store, monkeypatch):
+    relogio = [1000]
+    monkeypatch.setattr(ratelimit, "_now", lambda: relogio[0])
+
+    # 3 tentativas por janela de 60 s: a terceira dentro da janela bloqueia
+    for t in (1000, 1030):
+        relogio[0] = t
+        assert store.hit("k", 3, 300, 60) == 0
+    relogio[0] = 1059
+    assert store.hit("k", 3, 300, 60) == 300
+
+    store.clear("k")
+    for t in (2000, 2040):
+        relogio[0] = t
+        assert store.hit("k", 3, 300, 60) == 0
+    # a janela aberta em t=2000 venceu em t=2060: a contagem recomeça
+    relogio[0] = 2061
+    assert store.hit("k", 3, 300, 60) == 0
+    relogio[0] = 2062
+    assert store.hit("k", 3, 300, 60) == 0
+    assert store.locked("k") == 0
+    relogio[0] = 2063
+    assert store.hit("k", 3, 300, 60) == 300
+
+
+def test_x_forwarded_for_nao_contorna_a_cota(app):
+    app.config["VERIFY_API_MAX_REQUESTS"] = 2
+    cliente = app.test_client()
+    status = [cliente.post("/verificar/api/lote", json={"itens": []},
+                           headers={"X-Forwarded-For": f"203.0.113.{i}"}).status_code
+              for i in range(3)]
+    assert status == [200, 200, 429]
+
+
+def _login(app, cpf):
+    c = app.test_client()
+    c.get("/login")
+    c.post("/login", data={"email": USUARIO["email"], "cpf": cpf, "csrf_token": csrf(c)})
+    with c.session_transaction() as s:
+        return c, s.get("user")
+
+
+def test_bloqueio_apos_tentativas(app):
+    app.config.update(MAX_LOGIN_ATTEMPTS=3, LOCKOUT_SECONDS=60)
+    for _ in range(3):
+        assert _login(app, "52998224725")[1] is None
+    c, usuario = _login(app, USUARIO["cpf"])
+    assert usuario is None   # CPF certo, mas a chave está bloqueada
+    assert "Tentativas excedidas" in c.get("/login").get_data(as_text=True)
@@ -0,0 +1,57 @@
+import hashlib, io
+
+from models import db, Signature
+from reindex import reindex_once
+from storage import storage
+
+NOME = "assinado_contrato_0123456789.pdf"
+
+
+def _gravar(conteudo: bytes):
+    storage.save_stream(f"assinados/{NOME}", io.BytesIO(conteudo))
+    return hashlib.sha256(conteudo).hexdigest()
+
+
+def _linhas():
+    return Signature.query.filter_by(arquivo=NOME).order_by(Signature.id).all()
+
+
+def test_reindex_preserva_sha256_de_cada_versao(app):
+    with app.app_context():
+        atual = _gravar(b"%PDF versao 3")
+        # mesmo arquivo assinado 3 vezes: as duas primeiras versões já foram sobrescritas em disco
+        for sha in ("a" * 64, "b" * 64, atual):
+            db.session.add(Signature(crc="0123456789", sha256=sha, arquivo=NOME))
+        db.session.commit()
+
+        stats = reindex_once(workers=1, full=True, log=lambda *_: None)
+        assert stats["atualizados"] == 1 and stats["divergentes"] == 0
+        assert [s.sha256 for s in _linhas()] == ["a" * 64, "b" * 64, atual]
+        assert [s.tamanho for s in _linhas()] == [None, None, len(b"%PDF versao 3")]
+
+        # incremental: decide pela linha mais recente, que já está em dia
+        assert reindex_once(workers=1, log=lambda *_: None)["hasheados"] == 0
+
+
+def test_reindex_nao_oficializa_arquivo_adulterado(app):
+    with app.app_context():
+        original = _gravar(b"%PDF original")
+        db.session.add(Signature(crc="0123456789", sha256=original, arquivo=NOME))
+        db.session.commit()
+        _gravar(b"%PDF adulterado")
+
+        avisos = []
+        for _ in range(2):   # continua aparecendo nas passadas seguintes
+            stats = reindex_once(workers=1, log=avisos.append)
+            assert stats["divergentes"] == 1
+        assert len(avisos) == 2 and NOME in avisos[0]
+        assert [s.sha256 for s in _linhas()] == [original]
+
+
+def test_reindex_registra_arquivo_sem_linha(app):
+    with app.app_context():
+        sha = _gravar(b"%PDF antigo")
+        stats = reindex_once(workers=1, log=lambda *_: None)
+        assert stats["novos"] == 1
+        (linha,) = _linhas()
+        assert (linha.crc, linha.sha256) == ("0123456789", sha)
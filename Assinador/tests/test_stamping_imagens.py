@@ -0,0 +1,85 @@
+import hashlib
+
+import pytest
+from PIL import Image, ImageChops, PngImagePlugin
+
+from conftest import BASE_DIR
+import stamping
+
+TAMANHO = (600, 848)
+
+
+@pytest.fixture(autouse=True)
+def _cwd(monkeypatch):
+    monkeypatch.chdir(BASE_DIR)   # brasão/fontes em static/
+
+
+def _stamps(page=1):
+    linhas = stamping.stamp_lines("Fulano de Tal", "***.456.789-**", None, "SEMED", "Aprovado",
+                                  "0001/2025", "0123456789")
+    return [{"placement": {"page": page, "x": 40, "y": 40, "w": 120, "h": 120,
+                           "canvas_w": TAMANHO[0], "canvas_h": TAMANHO[1]},
+             "linhas": linhas, "status": "Aprovado", "orgao": None}]
+
+
+def _carimbar(src, dst, stamps=None):
+    sha = stamping.stamp_image(str(src), str(dst), stamps or _stamps(), stamping.qr_png("http://x/v/0123456789"))
+    assert sha == hashlib.sha256(dst.read_bytes()).hexdigest()
+    return Image.open(dst)
+
+
+def _longe_do_carimbo(a, b):
+    """Metade de baixo da página não é tocada pelo carimbo (canto superior esquerdo)."""
+    caixa = (0, TAMANHO[1] // 2, TAMANHO[0], TAMANHO[1])
+    return ImageChops.difference(a.convert("RGB").crop(caixa), b.convert("RGB").crop(caixa)).getbbox() is None
+
+
+def test_png_paleta_com_transparencia(tmp_path):
+    src = tmp_path / "paleta.png"
+    img = Image.new("P", TAMANHO, 0)
+    img.putpalette([255, 255, 255, 0, 0, 255] + [0] * 762)
+    img.paste(1, (300, 500, 400, 600))
+    img.save(src, transparency=0)
+
+    out = _carimbar(src, tmp_path / "out.png")
+    assert out.mode == "RGBA"
+    assert out.getpixel((590, 840))[3] == 0          # fundo continua transparente
+    assert out.getpixel((350, 550)) == (0, 0, 255, 255)
+    assert out.crop((0, 0, 300, 400)).getbbox() is not None   # carimbo visível (alfa > 0)
+
+
+def test_png_rgb_mantem_textos_e_pixels_fora_do_carimbo(tmp_path):
+    src = tmp_path / "rgb.png"
+    info = PngImagePlugin.PngInfo()
+    info.add_text("Autor", "SEMED")
+    Image.linear_gradient("L").resize(TAMANHO).convert("RGB").save(src, pnginfo=info, dpi=(300, 300))
+
+    out = _carimbar(src, tmp_path / "out.png")
+    assert out.mode == "RGB" and out.text.get("Autor") == "SEMED"
+    assert round(out.info["dpi"][0]) == 300
+    assert _longe_do_carimbo(Image.open(src), out)
+
+
+def test_jpeg_mantem_tabelas_de_quantizacao(tmp_path):
+    src = tmp_path / "foto.jpg"
+    Image.linear_gradient("L").resize(TAMANHO).convert("RGB").save(src, quality=60, subsampling=2)
+
+    out = _carimbar(src, tmp_path / "out.jpg")
+    original = Image.open(src)
+    assert out.format == "JPEG" and out.quantization == original.quantization
+
+
+def test_tiff_multipagina_carimba_so_a_pagina_pedida(tmp_path):
+    src = tmp_path / "scan.tif"
+    paginas = [Image.new("1", TAMANHO, 1), Image.new("L", TAMANHO, 200), Image.new("RGB", TAMANHO, "white")]
+    paginas[0].save(src, save_all=True, append_images=paginas[1:], compression="tiff_deflate")
+
+    out = _carimbar(src, tmp_path / "out.tif", _stamps(page=2))
+    assert out.n_frames == 3
+    modos = []
+    for i, pagina in enumerate(paginas):
+        out.seek(i)
+        modos.append(out.mode)
+        alterada = ImageChops.difference(out.convert("RGB"), pagina.convert("RGB")).getbbox() is not None
+        assert alterada == (i == 1)
+    assert modos == ["1", "L", "RGB"]
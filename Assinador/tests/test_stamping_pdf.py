@@ -0,0 +1,77 @@
+import hashlib, os
+
+import fitz
+import pytest
+
+from conftest import BASE_DIR, UPLOADS_DIR, assinar
+import stamping
+
+PDF = os.path.join(UPLOADS_DIR, "exemplo_A4.pdf")
+
+
+@pytest.fixture(autouse=True)
+def _cwd(monkeypatch):
+    monkeypatch.chdir(BASE_DIR)   # brasão/fontes em static/
+
+
+def _stamps(page=1):
+    linhas = stamping.stamp_lines("Fulano de Tal", "***.456.789-**", None, "SEMED", "Aprovado",
+                                  "0001/2025", "0123456789")
+    return [{"placement": {"page": page, "x": 40, "y": 40, "w": 120, "h": 120,
+                           "canvas_w": 600, "canvas_h": 848},
+             "linhas": linhas, "status": "Aprovado", "orgao": None}]
+
+
+def _carimbar(dst, **kwargs):
+    sha = stamping.stamp_pdf(PDF, str(dst), _stamps(kwargs.pop("page", 1)),
+                             stamping.qr_png("http://x/v/0123456789"), **kwargs)
+    assert sha == hashlib.sha256(dst.read_bytes()).hexdigest()
+    return fitz.open(dst)
+
+
+def _carimbado(doc, n=0):
+    return "0123456789" in doc[n].get_text() and doc[n].get_images()
+
+
+@pytest.mark.parametrize("perfil", list(stamping.PDF_PROFILES))
+def test_perfis_geram_pdf_carimbado(tmp_path, perfil):
+    original = fitz.open(PDF)
+    doc = _carimbar(tmp_path / f"{perfil}.pdf", profile=perfil)
+    assert doc.page_count == original.page_count and _carimbado(doc)
+    assert bool(doc.is_fast_webaccess) == (perfil == "web")
+
+
+def test_compact_nao_e_maior_que_fast(tmp_path):
+    _carimbar(tmp_path / "fast.pdf", profile="fast")
+    _carimbar(tmp_path / "compact.pdf", profile="compact")
+    assert os.path.getsize(tmp_path / "compact.pdf") <= os.path.getsize(tmp_path / "fast.pdf")
+
+
+def test_perfil_invalido(tmp_path):
+    with pytest.raises(ValueError):
+        _carimbar(tmp_path / "x.pdf", profile="turbo")
+
+
+def test_perfil_invalido_no_formulario(app, client):
+    r = assinar(client, PDF, pdf_profile="turbo")
+    assert "pdf_profile inválido" in r.get_data(as_text=True)
+
+
+@pytest.mark.parametrize("perfil", ["fast", "compact"])
+def test_incremental_preserva_os_bytes_originais(tmp_path, perfil):
+    original = open(PDF, "rb").read()
+    doc = _carimbar(tmp_path / "inc.pdf", output_mode="incremental", profile=perfil, page="all")
+    saida = (tmp_path / "inc.pdf").read_bytes()
+    assert saida[:len(original)] == original and len(saida) > len(original)
+    assert all(_carimbado(doc, n) for n in range(doc.page_count))
+
+
+def test_incremental_sem_suporte_regrava_inteiro(tmp_path):
+    # PDF com xref quebrado precisa de reparo: não aceita atualização incremental
+    quebrado = tmp_path / "quebrado.pdf"
+    quebrado.write_bytes(open(PDF, "rb").read().replace(b"startxref", b"startxrex"))
+    sha = stamping.stamp_pdf(str(quebrado), str(tmp_path / "out.pdf"), _stamps(),
+                             stamping.qr_png("http://x/v/0123456789"), output_mode="incremental")
+    saida = (tmp_path / "out.pdf").read_bytes()
+    assert sha == hashlib.sha256(saida).hexdigest() and not saida.startswith(quebrado.read_bytes())
+    assert _carimbado(fitz.open(tmp_path / "out.pdf"))
@@ -0,0 +1,42 @@
+import io
+import os
+
+import pytest
+
+from storage import LocalStorage, normalize_key
+
+
+def test_grava_particionado_e_le_legado(tmp_path):
+    st = LocalStorage(str(tmp_path), shard_depth=1)
+    sha = st.save_stream("assinados/abc.pdf", io.BytesIO(b"%PDF novo"))
+    caminho = st.local_path("assinados/abc.pdf")
+    assert caminho == st.path("assinados/abc.pdf")
+    assert os.path.dirname(caminho) != str(tmp_path / "assinados")   # há uma pasta de partição
+    assert st.sha256("assinados/abc.pdf") == sha
+
+    # arquivo gravado antes do particionamento continua acessível
+    (tmp_path / "assinados" / "antigo.pdf").write_bytes(b"%PDF legado")
+    with st.open("assinados/antigo.pdf") as f:
+        assert f.read() == b"%PDF legado"
+
+
+def test_scan_ignora_temporarios(tmp_path):
+    st = LocalStorage(str(tmp_path), shard_depth=2)
+    st.save_stream("assinados/a.pdf", io.BytesIO(b"a"))
+    (tmp_path / "assinados" / "b.pdf").write_bytes(b"bb")
+    st.work_path("assinados/c.pdf")   # temporário abandonado
+    assert sorted(nome for nome, _, _ in st.scan("assinados")) == ["a.pdf", "b.pdf"]
+
+
+def test_put_content_deduplica(tmp_path):
+    st = LocalStorage(str(tmp_path))
+    sha1, chave1, _ = st.put_content("uploads", io.BytesIO(b"mesmo"), ".pdf")
+    sha2, chave2, _ = st.put_content("uploads", io.BytesIO(b"mesmo"), ".pdf")
+    assert (sha1, chave1) == (sha2, chave2) and chave1 == f"uploads/{sha1}.pdf"
+    assert [n for n, _, _ in st.scan("uploads")] == [f"{sha1}.pdf"]
+
+
+@pytest.mark.parametrize("chave", ["../x.pdf", "assinados/../../x", "semarea", "assinados//x"])
+def test_chave_invalida(chave):
+    with pytest.raises(ValueError):
+        normalize_key(chave)
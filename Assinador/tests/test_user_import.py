@@ -0,0 +1,49 @@
+import threading, time
+
+from conftest import USUARIO
+from models import User
+from passwords import password_hashing
+from user_import import importar_usuarios
+
+PLANILHA = """Nome;E-mail;CPF;Órgão
+Beltrana Souza;beltrana@exemplo.gov.br;529.982.247-25;SEMED
+Ciclano Lima;ciclano@exemplo.gov.br;11144477735;SEMAD
+E-mail ruim;nao-e-email;52998224725;SEMAD
+Repetido;beltrana@exemplo.gov.br;11144477735;SEMED
+Fulano de Tal;{email};{cpf};SEMED
+""".format(**USUARIO).encode("utf-8")
+
+
+def test_importa_csv_e_ignora_existentes(app):
+    with app.app_context():
+        rel = importar_usuarios(PLANILHA, "rh.csv")
+        assert (rel["total"], rel["criados"], rel["ignorados"]) == (5, 2, 1)
+        assert [e["linha"] for e in rel["erros"]] == [4, 5, 6]
+        u = User.query.filter_by(email="beltrana@exemplo.gov.br").one()
+        assert u.orgao == "SEMED" and u.cpf_masked == "529.982.247-25"
+        assert password_hashing.policy.verify(u.cpf_hash, "52998224725")
+
+
+def test_hashes_no_pool_do_login(app, monkeypatch):
+    # a importação não passa de PASSWORD_HASH_WORKERS hashes simultâneos
+    ativos, pico, threads, lock = [0], [0], set(), threading.Lock()
+    original = password_hashing.policy.hash
+
+    def contando(texto):
+        with lock:
+            ativos[0] += 1
+            pico[0] = max(pico[0], ativos[0])
+            threads.add(threading.current_thread().name.split("_")[0])
+        time.sleep(0.01)
+        try:
+            return original(texto)
+        finally:
+            with lock:
+                ativos[0] -= 1
+
+    monkeypatch.setattr(password_hashing.policy, "hash", contando)
+    linhas = ["nome;email;cpf"] + [f"U{i};u{i}@exemplo.gov.br;52998224725" for i in range(12)]
+    with app.app_context():
+        rel = importar_usuarios("\n".join(linhas).encode(), "rh.csv")
+    assert rel["criados"] == 12
+    assert 1 <= pico[0] <= password_hashing.workers and threads == {"pwhash"}
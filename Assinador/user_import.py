@@ -0,0 +1,207 @@
+# user_import.py — Importação de usuários em lote (CSV/XLSX da planilha de RH)
+# ------------------------------------------------------------------------------------
+# Uso:
+#   POST /usuarios/importar (admin; campo "planilha", opcional "atualizar=1")
+#   flask --app app import-users planilha.csv [--atualizar]
+#
+# Colunas (cabeçalho, sem diferenciar maiúsculas/acentos): nome, email, cpf, orgao,
+# setor, matricula, cargo. CSV com "," ou ";" (UTF-8 ou Latin-1). XLSX via openpyxl
+# (em requirements.txt).
+#
+# E-mails já cadastrados são consultados em blocos (IN), os hashes de CPF são
+# calculados no pool do login (passwords.hash_many: PASSWORD_HASH_WORKERS threads, sem
+# tomar a fila de quem está entrando) e as linhas entram em transações de IMPORT_BATCH
+# (insert/update em massa).
+import csv, io, os, time, unicodedata
+import click
+from flask.cli import with_appcontext
+
+from models import db, User
+from auth import normalize_cpf, is_valid_email, is_valid_cpf_digits
+from passwords import password_hashing
+
+IMPORT_BATCH = 500
+CAMPOS = ("nome", "email", "cpf", "orgao", "setor", "matricula", "cargo")
+MAX_LEN = {"nome": 255, "orgao": 120, "setor": 120, "matricula": 50, "cargo": 120}
+
+
+def _coluna(nome: str) -> str:
+    txt = unicodedata.normalize("NFKD", str(nome or "")).encode("ascii", "ignore").decode("ascii")
+    return txt.strip().lower().replace("-", "").replace(" ", "")   # "E-mail" -> "email"
+
+
+def _linhas_csv(dados: bytes):
+    try:
+        texto = dados.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        texto = dados.decode("latin-1")
+    amostra = texto[:4096]
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=",;\t")
+    except csv.Error:
+        dialeto = csv.excel
+    return csv.reader(io.StringIO(texto), dialeto)
+
+
+def _linhas_xlsx(dados: bytes):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Importação de XLSX requer o pacote openpyxl (requirements.txt). Envie CSV ou atualize as dependências.")
+    wb = load_workbook(io.BytesIO(dados), read_only=True, data_only=True)
+    for row in wb.active.iter_rows(values_only=True):
+        yield ["" if v is None else str(v) for v in row]
+
+
+def ler_planilha(dados: bytes, nome_arquivo: str):
+    """Gera (nº da linha, dict com CAMPOS) a partir do CSV/XLSX; a linha 1 é o cabeçalho."""
+    ext = os.path.splitext(nome_arquivo or "")[1].lower()
+    if ext in (".xlsx", ".xlsm"):
+        linhas = _linhas_xlsx(dados)
+    elif ext in (".csv", ".txt", ""):
+        linhas = _linhas_csv(dados)
+    else:
+        raise ValueError("Formato não suportado. Envie CSV ou XLSX.")
+
+    linhas = iter(linhas)
+    cabecalho = [_coluna(c) for c in next(linhas, [])]
+    faltando = [c for c in ("nome", "email", "cpf") if c not in cabecalho]
+    if faltando:
+        raise ValueError(f"Cabeçalho sem as colunas obrigatórias: {', '.join(faltando)}.")
+    idx = {c: cabecalho.index(c) for c in CAMPOS if c in cabecalho}
+    for n, row in enumerate(linhas, start=2):
+        if not any((v or "").strip() for v in row):
+            continue
+        yield n, {c: (row[i].strip() if i < len(row) and row[i] else "") for c, i in idx.items()}
+
+
+def _validar(reg: dict):
+    reg["email"] = reg.get("email", "").lower()
+    reg["cpf"] = normalize_cpf(reg.get("cpf"))
+    if len(reg["cpf"]) < 11 and reg["cpf"]:
+        reg["cpf"] = reg["cpf"].zfill(11)   # planilhas costumam perder zeros à esquerda
+    if not reg.get("nome"):
+        return "Nome vazio."
+    if not is_valid_email(reg["email"]):
+        return "E-mail inválido."
+    if not is_valid_cpf_digits(reg["cpf"]):
+        return "CPF inválido (11 dígitos)."
+    for campo, n in MAX_LEN.items():
+        if len(reg.get(campo, "")) > n:
+            return f"{campo} excede {n} caracteres."
+    return None
+
+
+def _existentes(emails):
+    """email -> id dos já cadastrados, consultando em blocos de IMPORT_BATCH."""
+    emails = list(emails)
+    achados = {}
+    for i in range(0, len(emails), IMPORT_BATCH):
+        bloco = emails[i:i + IMPORT_BATCH]
+        for uid, email in db.session.query(User.id, User.email).filter(User.email.in_(bloco)):
+            achados[email.lower()] = uid
+    return achados
+
+
+def importar_usuarios(dados: bytes, nome_arquivo: str, atualizar: bool = False) -> dict:
+    """
+    Importa a planilha e devolve o relatório:
+      {total, criados, atualizados, ignorados, erros=[{linha, email, erro}], tempos={...}}
+    Com atualizar=False, e-mails já cadastrados são ignorados (e listados em erros).
+    """
+    t0 = time.perf_counter()
+    tempos = {}
+    erros, validos, vistos = [], [], {}
+    total = 0
+    for n, reg in ler_planilha(dados, nome_arquivo):
+        total += 1
+        erro = _validar(reg)
+        if not erro and reg["email"] in vistos:
+            erro = f"E-mail repetido na planilha (linha {vistos[reg['email']]})."
+        if erro:
+            erros.append({"linha": n, "email": reg.get("email", ""), "erro": erro})
+            continue
+        vistos[reg["email"]] = n
+        validos.append((n, reg))
+    tempos["leitura"] = time.perf_counter() - t0
+
+    t = time.perf_counter()
+    existentes = _existentes(vistos)
+    ignorados = 0
+    if not atualizar:
+        novos = []
+        for n, reg in validos:
+            if reg["email"] in existentes:
+                erros.append({"linha": n, "email": reg["email"], "erro": "E-mail já cadastrado (ignorado)."})
+                ignorados += 1
+            else:
+                novos.append((n, reg))
+        validos = novos
+    tempos["consulta"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    hashes = password_hashing.hash_many(reg["cpf"] for _, reg in validos)
+    tempos["hash"] = time.perf_counter() - t
+
+    t = time.perf_counter()
+    criados = atualizados = 0
+    for i in range(0, len(validos), IMPORT_BATCH):
+        inserir, alterar = [], []
+        for (_, reg), cpf_hash in zip(validos[i:i + IMPORT_BATCH], hashes[i:i + IMPORT_BATCH]):
+            cpf = reg["cpf"]
+            linha = {c: reg.get(c) or None for c in ("orgao", "setor", "matricula", "cargo")}
+            linha.update(nome=reg["nome"], email=reg["email"], cpf_hash=cpf_hash,
+                         cpf_masked=f"{cpf[:3]}.{cpf[3:6]}.{cpf[6:9]}-{cpf[9:]}")
+            if reg["email"] in existentes:
+                linha["id"] = existentes[reg["email"]]
+                del linha["email"]
+                alterar.append(linha)
+            else:
+                linha["is_admin"] = False
+                inserir.append(linha)
+        try:
+            if inserir:
+                db.session.execute(db.insert(User), inserir)
+            if alterar:
+                db.session.execute(db.update(User), alterar)
+            db.session.commit()
+            criados += len(inserir)
+            atualizados += len(alterar)
+        except Exception as e:
+            db.session.rollback()
+            for n, reg in validos[i:i + IMPORT_BATCH]:
+                erros.append({"linha": n, "email": reg["email"], "erro": f"Falha ao gravar o lote: {e.__class__.__name__}"})
+    tempos["banco"] = time.perf_counter() - t
+    tempos["total"] = time.perf_counter() - t0
+
+    erros.sort(key=lambda e: e["linha"])
+    return {
+        "total": total,
+        "criados": criados,
+        "atualizados": atualizados,
+        "ignorados": ignorados,
+        "erros": erros,
+        "tempos": {k: round(v, 3) for k, v in tempos.items()},
+    }
+
+
+@click.command("import-users")
+@click.argument("planilha", type=click.Path(exists=True, dir_okay=False))
+@click.option("--atualizar", is_flag=True, help="Atualiza usuários já cadastrados (mesmo e-mail).")
+@with_appcontext
+def import_users_command(planilha, atualizar):
+    """
+    Importa usuários de um CSV/XLSX (nome, email, cpf, orgao, setor, matricula, cargo).
+    Threads de hash: PASSWORD_HASH_WORKERS (fora do horário de uso, pode ser maior).
+    """
+    with open(planilha, "rb") as f:
+        dados = f.read()
+    try:
+        rel = importar_usuarios(dados, planilha, atualizar=atualizar)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    for e in rel["erros"]:
+        click.echo(f"linha {e['linha']}: {e['email']} — {e['erro']}")
+    click.echo(f"total={rel['total']} criados={rel['criados']} atualizados={rel['atualizados']} "
+               f"ignorados={rel['ignorados']} erros={len(rel['erros'])} "
+               + " ".join(f"{k}={v}s" for k, v in rel["tempos"].items()))